@@ -0,0 +1,238 @@
+import asyncio
+import random
+import aiohttp
+import google.auth.transport.requests
+from utils.parser import AcademicParser
+from api.classroom import (
+    ClassroomClient, DEFAULT_MAX_WORKERS, NUM_RETRIES, DEFAULT_PROFILE,
+    COURSE_FIELDS, SUBMISSION_FIELDS, TEACHER_FIELDS, work_fields
+)
+
+CLASSROOM_BASE_URL = "https://classroom.googleapis.com/v1"
+
+# Statuses worth retrying (with exponential backoff)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class AsyncClassroomClient:
+    """asyncio counterpart of ClassroomClient, built on aiohttp.
+
+    Returns the same data in the same format as ClassroomClient. At most
+    ``max_concurrency`` requests are in flight at once, however many courses
+    are gathered. Use as ``async with AsyncClassroomClient(creds) as client:``
+    or call ``close()`` when done.
+    """
+
+    # Same processing (and parser) as the synchronous client
+    _process_items = ClassroomClient._process_items
+
+    def __init__(self, creds, base_url=CLASSROOM_BASE_URL, max_concurrency=DEFAULT_MAX_WORKERS, session=None):
+        self.creds = creds
+        self.base_url = base_url.rstrip('/')
+        self.parser = AcademicParser()
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._refresh_lock = asyncio.Lock()
+        self._session = session
+        self._owns_session = session is None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None and self._owns_session:
+            await self._session.close()
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(raise_for_status=False)
+        return self._session
+
+    async def _headers(self):
+        """Authorization headers, refreshing the access token (off the event loop) when needed."""
+        if not self.creds.valid:
+            async with self._refresh_lock:
+                if not self.creds.valid:
+                    await asyncio.to_thread(self.creds.refresh, google.auth.transport.requests.Request())
+        headers = {}
+        self.creds.apply(headers)
+        return headers
+
+    async def _get(self, path, **params):
+        """GET a Classroom resource, retrying 429 / 5xx responses. Raises aiohttp.ClientResponseError."""
+        url = f"{self.base_url}/{path}"
+        for attempt in range(NUM_RETRIES + 1):
+            async with self._semaphore:
+                async with self._get_session().get(url, params=params, headers=await self._headers()) as resp:
+                    if resp.status not in RETRY_STATUSES or attempt == NUM_RETRIES:
+                        resp.raise_for_status()
+                        return await resp.json()
+            await asyncio.sleep(random.random() * 2 ** attempt)
+
+    async def _iter_items(self, path, items_key, page_size=None, limit=None, **params):
+        """Async counterpart of api.pagination.iter_items."""
+        if page_size:
+            params['pageSize'] = page_size
+        count = 0
+        while True:
+            page = await self._get(path, **params)
+            for item in page.get(items_key, []):
+                yield item
+                count += 1
+                if limit is not None and count >= limit:
+                    return
+            if not page.get('nextPageToken'):
+                return
+            params['pageToken'] = page['nextPageToken']
+
+    async def _list(self, path, items_key, **params):
+        return [item async for item in self._iter_items(path, items_key, **params)]
+
+    async def get_courses(self, page_size=None):
+        """Fetches all active courses (None if the API call failed)."""
+        try:
+            return await self._list(
+                'courses', 'courses', page_size=page_size,
+                courseStates='ACTIVE', fields=f'nextPageToken,{COURSE_FIELDS}'
+            )
+        except aiohttp.ClientError as error:
+            print(f"An error occurred: {error}")
+            return None
+
+    async def get_course_work(self, course_id, page_size=None, include_work=True, include_materials=True,
+                              profile=DEFAULT_PROFILE):
+        """Fetches all coursework AND materials for a course (both listings concurrently; None on failure)."""
+        listings = []
+        if include_work:
+            listings.append(self._list(
+                f'courses/{course_id}/courseWork', 'courseWork',
+                page_size=page_size, fields=work_fields('courseWork', profile)
+            ))
+        if include_materials:
+            listings.append(self._list(
+                f'courses/{course_id}/courseWorkMaterials', 'courseWorkMaterial',
+                page_size=page_size, fields=work_fields('courseWorkMaterial', profile)
+            ))
+        try:
+            results = await asyncio.gather(*listings)
+        except aiohttp.ClientError as error:
+            print(f"An error occurred: {error}")
+            return None
+        return self._process_items(item for items in results for item in items)
+
+    async def get_all_course_work(self, course_ids, profile=DEFAULT_PROFILE):
+        """Fetches coursework for several courses concurrently.
+
+        Returns one works list per course id, in the same order as ``course_ids``
+        (None for a course whose fetch failed).
+        """
+        return await asyncio.gather(*(self.get_course_work(course_id, profile=profile) for course_id in course_ids))
+
+    async def get_teachers(self, course_id, course_name=None, use_cache=True, page_size=None):
+        """Fetches teachers (including TAs) for a course with caching support."""
+        from utils.teacher_cache import TeacherCache
+
+        cache = TeacherCache()
+
+        # Try to get from cache first
+        if use_cache and course_name:
+            cached_teachers = cache.get_teachers(course_name)
+            if cached_teachers is not None:
+                teachers = [{
+                    'userId': ct.get('userId'),
+                    'profile': {
+                        'name': {'fullName': ct.get('name')},
+                        'emailAddress': ct.get('email'),
+                        'photoUrl': ct.get('photoUrl')
+                    }
+                } for ct in cached_teachers]
+                # Photos left out by rate limiting last time: try those again
+                if cache.needs_photo_retry(course_name):
+                    complete = await self._fill_teacher_photos(teachers)
+                    cache.save_teachers(course_name, teachers, photos_complete=complete)
+                return teachers
+
+        try:
+            teachers = await self._list(
+                f'courses/{course_id}/teachers', 'teachers',
+                page_size=page_size, fields=f'nextPageToken,{TEACHER_FIELDS}'
+            )
+        except aiohttp.ClientError as error:
+            print(f"An error occurred: {error}")
+            return []
+
+        # Attempt to fetch photos if missing (backing off on 429)
+        complete = await self._fill_teacher_photos(teachers)
+
+        if course_name:
+            cache.save_teachers(course_name, teachers, photos_complete=complete)
+        return teachers
+
+    async def _fill_teacher_photos(self, teachers):
+        """Async counterpart of ClassroomClient._fill_teacher_photos.
+
+        Lookups run concurrently (within max_concurrency); _get already retries
+        429s with backoff. Returns False if rate limiting still left photos out.
+        """
+        rate_limited = []
+
+        async def fill_photo(teacher):
+            try:
+                profile = await self._get(f"userProfiles/{teacher['userId']}", fields='id,photoUrl')
+            except aiohttp.ClientResponseError as e:
+                if e.status == 429:
+                    rate_limited.append(teacher['userId'])
+                return
+            except aiohttp.ClientError:
+                return
+            if 'photoUrl' in profile:
+                teacher.setdefault('profile', {})['photoUrl'] = profile['photoUrl']
+
+        await asyncio.gather(*(
+            fill_photo(teacher) for teacher in teachers
+            if teacher.get('userId') and not teacher.get('profile', {}).get('photoUrl')
+        ))
+
+        if rate_limited:
+            print(f"Rate limit hit for teacher photos. {len(rate_limited)} will be fetched later.")
+        return not rate_limited
+
+    async def get_my_submissions(self, course_id, course_work_id):
+        """Fetches user's submission and grades."""
+        try:
+            results = await self._get(
+                f'courses/{course_id}/courseWork/{course_work_id}/studentSubmissions',
+                userId='me', fields=SUBMISSION_FIELDS
+            )
+        except aiohttp.ClientError:
+            return None
+        submissions = results.get('studentSubmissions', [])
+        if submissions:
+            sub = submissions[0]
+            return {
+                'state': sub.get('state'),
+                'assigned_grade': sub.get('assignedGrade'),
+                'draft_grade': sub.get('draftGrade')
+            }
+        return None
+
+    async def get_all_my_submissions(self, course_id):
+        """The user's submissions for every coursework item in a course, keyed by courseWorkId (None on failure)."""
+        submissions = {}
+        try:
+            async for sub in self._iter_items(
+                f'courses/{course_id}/courseWork/-/studentSubmissions', 'studentSubmissions',
+                userId='me', fields=f'nextPageToken,{SUBMISSION_FIELDS}'
+            ):
+                submissions[sub['courseWorkId']] = {
+                    'state': sub.get('state'),
+                    'assigned_grade': sub.get('assignedGrade'),
+                    'draft_grade': sub.get('draftGrade'),
+                    'update_time': sub.get('updateTime')
+                }
+        except aiohttp.ClientError as error:
+            print(f"An error occurred: {error}")
+            return None
+        return submissions
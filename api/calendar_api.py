@@ -1,54 +1,95 @@
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from datetime import datetime, timedelta
+import json
+import hashlib
 import pytz
+from api.pagination import iter_items
+from api.services import get_service, authorized_http
+
+# Events per page (Calendar allows up to 2500; 250 is its default)
+MAX_PAGE_SIZE = 250
+
+# Calendar accepts at most 50 calls per batch request
+BATCH_SIZE = 50
+
+# Private extendedProperties value marking events created by the assignment sync
+SYNC_SOURCE = 'classroom-assignments'
+
+def _sync_hash(event):
+    """Fingerprint of the synced fields of an event body, stored on the event to detect changes."""
+    synced = {field: event[field] for field in ('summary', 'description', 'start', 'end')}
+    return hashlib.sha1(json.dumps(synced, sort_keys=True).encode()).hexdigest()
+
+def _event_key(event):
+    """(courseId, courseWorkId) of a synced event, or None."""
+    private = event.get('extendedProperties', {}).get('private', {})
+    if private.get('source') != SYNC_SOURCE:
+        return None
+    return private.get('courseId'), private.get('courseWorkId')
 
 class CalendarClient:
     def __init__(self, creds):
-        self.service = build('calendar', 'v3', credentials=creds)
+        self.creds = creds
+        self.service = get_service('calendar', 'v3', creds)
+
+    def _http(self):
+        """Authorized HTTP transport owned by the calling thread (see api.services.authorized_http)."""
+        return authorized_http(self.creds)
     
+    def iter_upcoming_events(self, max_results=None, page_size=MAX_PAGE_SIZE):
+        """Lazily yield upcoming calendar events across pages (at most max_results)"""
+        now = datetime.utcnow().isoformat() + 'Z'
+        if max_results:
+            page_size = min(page_size, max_results)
+        return iter_items(
+            self.service.events().list, 'items',
+            http=self._http(),
+            limit=max_results,
+            page_size=page_size,
+            page_size_param='maxResults',
+            calendarId='primary',
+            timeMin=now,
+            singleEvents=True,
+            orderBy='startTime',
+            # Fetch ALL event details
+            fields='nextPageToken,items(id,summary,description,location,start,end,attendees,creator,organizer,htmlLink,colorId,status)'
+        )
+
     def get_upcoming_events(self, max_results=50):
         """Fetch upcoming calendar events"""
         try:
-            now = datetime.utcnow().isoformat() + 'Z'
-            events_result = self.service.events().list(
-                calendarId='primary',
-                timeMin=now,
-                maxResults=max_results,
-                singleEvents=True,
-                orderBy='startTime',
-                # Fetch ALL event details
-                fields='items(id,summary,description,location,start,end,attendees,creator,organizer,htmlLink,colorId,status)'
-            ).execute()
-            return events_result.get('items', [])
+            return list(self.iter_upcoming_events(max_results=max_results))
         except HttpError as error:
             print(f"An error occurred: {error}")
             return []
     
+    @staticmethod
+    def _build_event(summary, description, start_time, end_time, course_name="", event_type=""):
+        return {
+            'summary': f"[{event_type}] {summary}" if event_type else summary,
+            'description': f"Course: {course_name}\n\n{description}" if course_name else description,
+            'start': {
+                'dateTime': start_time.isoformat(),
+                'timeZone': 'UTC',
+            },
+            'end': {
+                'dateTime': end_time.isoformat(),
+                'timeZone': 'UTC',
+            },
+            'reminders': {
+                'useDefault': False,
+                'overrides': [
+                    {'method': 'popup', 'minutes': 6 * 60},   # 6 hours before
+                    {'method': 'popup', 'minutes': 24 * 60},  # 1 day before
+                ],
+            },
+        }
+
     def create_event(self, summary, description, start_time, end_time, course_name="", event_type=""):
         """Create a calendar event"""
         try:
-            event = {
-                'summary': f"[{event_type}] {summary}" if event_type else summary,
-                'description': f"Course: {course_name}\n\n{description}" if course_name else description,
-                'start': {
-                    'dateTime': start_time.isoformat(),
-                    'timeZone': 'UTC',
-                },
-                'end': {
-                    'dateTime': end_time.isoformat(),
-                    'timeZone': 'UTC',
-                },
-                'reminders': {
-                    'useDefault': False,
-                    'overrides': [
-                        {'method': 'popup', 'minutes': 6 * 60},   # 6 hours before
-                        {'method': 'popup', 'minutes': 24 * 60},  # 1 day before
-                    ],
-                },
-            }
-            
-            event = self.service.events().insert(calendarId='primary', body=event).execute()
+            event = self._build_event(summary, description, start_time, end_time, course_name, event_type)
+            event = self.service.events().insert(calendarId='primary', body=event).execute(http=self._http())
             return event.get('id'), event.get('htmlLink')
         except HttpError as error:
             print(f"An error occurred: {error}")
@@ -57,38 +98,168 @@ class CalendarClient:
     def delete_event(self, event_id):
         """Delete a calendar event"""
         try:
-            self.service.events().delete(calendarId='primary', eventId=event_id).execute()
+            self.service.events().delete(calendarId='primary', eventId=event_id).execute(http=self._http())
             return True
         except HttpError as error:
             print(f"An error occurred: {error}")
             return False
     
-    def sync_assignments(self, assignments, course_name):
-        """Sync upcoming assignments to calendar"""
-        synced_count = 0
+    def _assignment_event(self, work, course_id, course_name):
+        """Event body for an assignment, tagged with its courseId / courseWorkId."""
+        event = self._build_event(
+            work['title'],
+            work.get('description', 'No description'),
+            work['deadline'] - timedelta(hours=6),  # 6 hours before deadline
+            work['deadline'],
+            course_name,
+            work.get('type', 'ASSIGNMENT')
+        )
+        event['extendedProperties'] = {'private': {
+            'source': SYNC_SOURCE,
+            'courseId': course_id,
+            'courseWorkId': work['id'],
+            'syncHash': _sync_hash(event),
+        }}
+        return event
+
+    def iter_synced_events(self, time_min=None):
+        """Lazily yield events created by the assignment sync that haven't ended yet"""
+        return iter_items(
+            self.service.events().list, 'items',
+            http=self._http(),
+            page_size=MAX_PAGE_SIZE,
+            page_size_param='maxResults',
+            calendarId='primary',
+            timeMin=time_min or datetime.utcnow().isoformat() + 'Z',
+            singleEvents=True,
+            privateExtendedProperty=f'source={SYNC_SOURCE}',
+            fields='nextPageToken,items(id,extendedProperties)'
+        )
+
+    def _legacy_events(self, time_max):
+        """Untagged upcoming events (from the old title-based sync), keyed by (summary, course line)."""
+        events = iter_items(
+            self.service.events().list, 'items',
+            http=self._http(),
+            page_size=MAX_PAGE_SIZE,
+            page_size_param='maxResults',
+            calendarId='primary',
+            timeMin=datetime.utcnow().isoformat() + 'Z',
+            timeMax=time_max.isoformat(),
+            singleEvents=True,
+            fields='nextPageToken,items(id,summary,description,extendedProperties)'
+        )
+        return {
+            (event.get('summary'), (event.get('description') or '').split('\n', 1)[0]): event['id']
+            for event in events if 'extendedProperties' not in event
+        }
+
+    def _execute_batch(self, calls):
+        """Runs (request_id, request) pairs in batches; returns the ids of the calls that failed."""
+        failed = []
+
+        def on_response(request_id, response, exception):
+            if exception is not None:
+                print(f"An error occurred: {exception}")
+                failed.append(request_id)
+
+        for start in range(0, len(calls), BATCH_SIZE):
+            http = self._http()
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for request_id, request in calls[start:start + BATCH_SIZE]:
+                # Sub-requests are authorized with their own transport, not the batch's
+                request.http = http
+                batch.add(request, request_id=request_id)
+            try:
+                batch.execute(http=http)
+            except HttpError as error:
+                print(f"An error occurred: {error}")
+                failed.extend(request_id for request_id, _ in calls[start:start + BATCH_SIZE])
+        return failed
+
+    def sync_courses(self, course_works, time_max=None):
+        """Idempotently sync upcoming assignments of several courses to the calendar.
+
+        course_works: (course, works) pairs, works as returned by ClassroomClient;
+        works=None marks a course whose coursework couldn't be fetched; its events
+        are left untouched
+        time_max: only create events for deadlines up to this time (existing events
+        are kept up to date whatever their deadline)
+
+        Events carry private extendedProperties (courseId / courseWorkId), so re-syncs
+        create missing events, update changed ones, delete events of assignments that
+        were removed or lost their upcoming deadline, and leave everything else alone.
+        Returns a dict of created / updated / deleted / unchanged / failed counts, and
+        the number of courses left alone because their coursework was unavailable.
+        """
         now = datetime.now(pytz.utc)
-        
-        for assignment in assignments:
-            if assignment['deadline'] and assignment['deadline'] > now:
-                # Create event
-                summary = assignment['title']
-                description = assignment.get('description', 'No description')
-                start_time = assignment['deadline'] - timedelta(hours=6)  # 6 hours before deadline
-                end_time = assignment['deadline']
-                
-                event_id, link = self.create_event(
-                    summary, 
-                    description, 
-                    start_time, 
-                    end_time,
-                    course_name,
-                    assignment['type']
-                )
-                
-                if event_id:
-                    synced_count += 1
-        
-        return synced_count
+        wanted = {}
+        deadlines = {}
+        in_window = set()
+        fetched = [(course, works) for course, works in course_works if works is not None]
+        for course, works in fetched:
+            for work in works:
+                if work.get('deadline') and work['deadline'] > now:
+                    key = (course['id'], work['id'])
+                    wanted[key] = self._assignment_event(work, course['id'], course['name'])
+                    deadlines[key] = work['deadline']
+                    if time_max is None or work['deadline'] <= time_max:
+                        in_window.add(key)
+
+        # Only courses fetched successfully are diffed: an unavailable course must not look empty
+        synced_courses = {course['id'] for course, _ in fetched}
+        summary = {
+            'created': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0, 'failed': 0,
+            'unavailable': len(course_works) - len(fetched)
+        }
+        if not synced_courses:
+            return summary
+        events = self.service.events()
+        calls = []
+        try:
+            existing = {}
+            for event in self.iter_synced_events():
+                key = _event_key(event)
+                if not key or key[0] not in synced_courses:
+                    continue
+                if key in existing or key not in wanted:
+                    # Duplicate, or its assignment is gone / no longer upcoming
+                    calls.append((f"deleted|{event['id']}", events.delete(calendarId='primary', eventId=event['id'])))
+                    continue
+                existing[key] = event
+                body = wanted[key]
+                stored_hash = event.get('extendedProperties', {}).get('private', {}).get('syncHash')
+                if stored_hash == body['extendedProperties']['private']['syncHash']:
+                    summary['unchanged'] += 1
+                else:
+                    calls.append((f"updated|{event['id']}", events.patch(calendarId='primary', eventId=event['id'], body=body)))
+
+            missing = [key for key in wanted if key in in_window and key not in existing]
+            legacy = self._legacy_events(max(deadlines[key] for key in missing)) if missing else {}
+            for key in missing:
+                body = wanted[key]
+                legacy_id = legacy.pop((body['summary'], body['description'].split('\n', 1)[0]), None)
+                if legacy_id:
+                    # Adopt the event made by the old title-based sync instead of duplicating it
+                    calls.append((f"updated|{legacy_id}", events.patch(calendarId='primary', eventId=legacy_id, body=body)))
+                else:
+                    calls.append((f"created|{'/'.join(key)}", events.insert(calendarId='primary', body=body)))
+        except HttpError as error:
+            print(f"An error occurred: {error}")
+            summary['failed'] += 1
+            return summary
+
+        failed = set(self._execute_batch(calls))
+        for request_id, _ in calls:
+            if request_id in failed:
+                summary['failed'] += 1
+            else:
+                summary[request_id.split('|', 1)[0]] += 1
+        return summary
+
+    def sync_assignments(self, assignments, course_name, course_id):
+        """Sync upcoming assignments of one course to calendar (assignments: all of its works, see sync_courses)"""
+        return self.sync_courses([({'id': course_id, 'name': course_name}, assignments)])
     
     def delete_past_events(self, days_ago=7):
         """Delete events older than specified days"""
@@ -96,14 +267,17 @@ class CalendarClient:
             time_min = (datetime.utcnow() - timedelta(days=days_ago)).isoformat() + 'Z'
             time_max = datetime.utcnow().isoformat() + 'Z'
             
-            events_result = self.service.events().list(
+            events = iter_items(
+                self.service.events().list, 'items',
+                http=self._http(),
+                page_size=MAX_PAGE_SIZE,
+                page_size_param='maxResults',
                 calendarId='primary',
                 timeMin=time_min,
                 timeMax=time_max,
-                singleEvents=True
-            ).execute()
-            
-            events = events_result.get('items', [])
+                singleEvents=True,
+                fields='nextPageToken,items(id)'
+            )
             deleted_count = 0
             
             for event in events:
@@ -118,7 +292,7 @@ class CalendarClient:
     def update_event(self, event_id, start_time, end_time):
         """Update a calendar event's time"""
         try:
-            event = self.service.events().get(calendarId='primary', eventId=event_id).execute()
+            event = self.service.events().get(calendarId='primary', eventId=event_id).execute(http=self._http())
             
             event['start']['dateTime'] = start_time.isoformat()
             event['end']['dateTime'] = end_time.isoformat()
@@ -127,7 +301,7 @@ class CalendarClient:
                 calendarId='primary', 
                 eventId=event_id, 
                 body=event
-            ).execute()
+            ).execute(http=self._http())
             
             return True
         except HttpError as error:
@@ -1,23 +1,74 @@
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+import time
+import random
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from datetime import datetime
 import dateutil.parser
 import pytz
 from utils.parser import AcademicParser
+from api.pagination import iter_items
+from api.services import get_service, authorized_http
+
+# Concurrent course fetches. Each course costs two list calls, so keep the
+# pool small enough to stay well inside the per-user Classroom quota.
+DEFAULT_MAX_WORKERS = 4
+MAX_WORKERS_LIMIT = 8
+
+# Retries (with exponential backoff) on 429 / 5xx responses
+NUM_RETRIES = 3
+
+# Sub-requests per batch HTTP call (two per course: courseWork + materials)
+BATCH_SIZE = 50
+
+# From this many items on, titles are classified with the vectorized parse_batch
+BATCH_PARSE_MIN_ITEMS = 100
+
+# Field masks: request only what the views use (no rubrics, assignee lists, etc.)
+COURSE_FIELDS = 'courses(id,name,section,alternateLink,updateTime)'
+SUBMISSION_FIELDS = 'studentSubmissions(courseWorkId,state,assignedGrade,draftGrade,updateTime)'
+TEACHER_FIELDS = 'teachers(userId,profile(id,name/fullName,emailAddress,photoUrl))'
+
+# Coursework fields per view ("profile"), lightest first. Each profile contains
+# every field of the ones before it, so data fetched for a richer profile can
+# serve a lighter one. All of them keep what _process_items and incremental
+# sync rely on (workType, updateTime).
+_GRADES_FIELDS = ['id', 'title', 'workType', 'maxPoints', 'dueDate', 'dueTime', 'creationTime', 'updateTime']
+COURSE_WORK_PROFILES = {
+    'grades': _GRADES_FIELDS,
+    'dashboard': _GRADES_FIELDS + ['alternateLink'],
+    'search': _GRADES_FIELDS + ['alternateLink', 'description'],
+    'detail': _GRADES_FIELDS + ['alternateLink', 'description', 'materials'],
+}
+DEFAULT_PROFILE = 'detail'
+
+# courseWorkMaterial resources only have these (asking for others is an error)
+MATERIAL_FIELDS = {'id', 'title', 'description', 'materials', 'alternateLink', 'creationTime', 'updateTime'}
+
+def work_fields(items_key, profile=DEFAULT_PROFILE):
+    """Partial-response mask for a courseWork / courseWorkMaterials list call."""
+    fields = COURSE_WORK_PROFILES[profile]
+    if items_key == 'courseWorkMaterial':
+        fields = [f for f in fields if f in MATERIAL_FIELDS]
+    return f"nextPageToken,{items_key}({','.join(fields)})"
 
 class ClassroomClient:
     def __init__(self, creds):
-        self.service = build('classroom', 'v1', credentials=creds)
-        self.drive_service = build('drive', 'v3', credentials=creds)
+        self.creds = creds
+        self.service = get_service('classroom', 'v1', creds)
+        self.drive_service = get_service('drive', 'v3', creds)
         self.parser = AcademicParser()
 
+    def _http(self):
+        """Authorized HTTP transport owned by the calling thread (see api.services.authorized_http)."""
+        return authorized_http(self.creds)
+
     def get_user_profile(self):
         """Fetches the user's Google Profile using Oauth2 API."""
         try:
             # Use Oauth2 API for better profile info (photo)
-            oauth2_service = build('oauth2', 'v2', credentials=self.service._http.credentials)
-            user_info = oauth2_service.userinfo().get().execute()
+            oauth2_service = get_service('oauth2', 'v2', self.creds)
+            user_info = oauth2_service.userinfo().get().execute(http=self._http())
             
             # Map to expected format
             return {
@@ -29,11 +80,11 @@ class ClassroomClient:
             print(f"Error fetching profile: {e}")
             # Fallback to Classroom API
             try:
-                return self.service.userProfiles().get(userId='me').execute()
+                return self.service.userProfiles().get(userId='me').execute(http=self._http())
             except:
                 return None
 
-    def get_teachers(self, course_id, course_name=None, use_cache=True):
+    def get_teachers(self, course_id, course_name=None, use_cache=True, page_size=None):
         """Fetches teachers (including TAs) for a course with caching support."""
         from utils.teacher_cache import TeacherCache
         
@@ -42,7 +93,7 @@ class ClassroomClient:
         # Try to get from cache first
         if use_cache and course_name:
             cached_teachers = cache.get_teachers(course_name)
-            if cached_teachers:
+            if cached_teachers is not None:
                 # Convert cached data back to expected format
                 teachers = []
                 for ct in cached_teachers:
@@ -54,118 +105,358 @@ class ClassroomClient:
                             'photoUrl': ct.get('photoUrl')
                         }
                     })
+                # Photos left out by rate limiting last time: try those again
+                if cache.needs_photo_retry(course_name):
+                    complete = self._fill_teacher_photos(teachers)
+                    cache.save_teachers(course_name, teachers, photos_complete=complete)
                 return teachers
         
         # Cache miss or disabled - fetch from API
         try:
-            results = self.service.courses().teachers().list(courseId=course_id).execute()
-            teachers = results.get('teachers', [])
+            teachers = list(iter_items(
+                self.service.courses().teachers().list, 'teachers',
+                courseId=course_id, page_size=page_size, fields=f'nextPageToken,{TEACHER_FIELDS}',
+                http=self._http(), num_retries=NUM_RETRIES
+            ))
             
-            # Attempt to fetch photos if missing (with rate limiting awareness)
-            for teacher in teachers:
-                profile = teacher.get('profile', {})
-                if 'photoUrl' not in profile and 'userId' in teacher:
-                    try:
-                        full_profile = self.service.userProfiles().get(userId=teacher['userId']).execute()
-                        if 'photoUrl' in full_profile:
-                            teacher['profile']['photoUrl'] = full_profile['photoUrl']
-                    except HttpError as e:
-                        if e.resp.status == 429:
-                            print(f"Rate limit hit for teacher photos. Skipping remaining.")
-                            break
-                        pass
-                    except:
-                        pass
+            # Attempt to fetch photos if missing (one batch request, backing off on 429)
+            complete = self._fill_teacher_photos(teachers)
             
             # Save to cache if course_name provided
             if course_name:
-                cache.save_teachers(course_name, teachers)
+                cache.save_teachers(course_name, teachers, photos_complete=complete)
                         
             return teachers
         except HttpError as error:
             print(f"An error occurred: {error}")
             return []
 
-    def get_courses(self):
-        """Fetches all active courses."""
+    def _fill_teacher_photos(self, teachers):
+        """Looks up missing teacher photos with batched userProfiles.get calls.
+
+        Lookups rejected with 429 are retried with exponential backoff, up to
+        NUM_RETRIES times. Returns False if rate limiting still left photos out.
+        """
+        missing = {
+            teacher['userId']: teacher for teacher in teachers
+            if teacher.get('userId') and not teacher.get('profile', {}).get('photoUrl')
+        }
+        rate_limited = set()
+        
+        def on_response(request_id, response, exception):
+            if exception is not None:
+                if isinstance(exception, HttpError) and exception.resp.status == 429:
+                    rate_limited.add(request_id)
+                return
+            if 'photoUrl' in response:
+                missing[request_id].setdefault('profile', {})['photoUrl'] = response['photoUrl']
+        
+        pending = list(missing)
+        for attempt in range(NUM_RETRIES + 1):
+            if not pending:
+                break
+            if attempt:
+                time.sleep(2 ** (attempt - 1) + random.random())
+            rate_limited.clear()
+            for start in range(0, len(pending), BATCH_SIZE):
+                chunk = pending[start:start + BATCH_SIZE]
+                http = self._http()
+                batch = self.service.new_batch_http_request(callback=on_response)
+                for user_id in chunk:
+                    request = self.service.userProfiles().get(userId=user_id, fields='id,photoUrl')
+                    # Sub-requests are authorized with their own transport, not the batch's
+                    request.http = http
+                    batch.add(request, request_id=user_id)
+                try:
+                    batch.execute(http=http)
+                except HttpError as e:
+                    if e.resp.status != 429:
+                        print(f"An error occurred: {e}")
+                        return True
+                    rate_limited.update(chunk)
+            pending = [user_id for user_id in pending if user_id in rate_limited]
+        
+        if pending:
+            print(f"Rate limit hit for teacher photos. {len(pending)} will be fetched later.")
+        return not pending
+
+    def iter_courses(self, page_size=None):
+        """Lazily yields active courses, requesting further pages only as needed."""
+        return iter_items(
+            self.service.courses().list, 'courses',
+            courseStates=['ACTIVE'], page_size=page_size, fields=f'nextPageToken,{COURSE_FIELDS}',
+            http=self._http(), num_retries=NUM_RETRIES
+        )
+
+    def get_courses(self, page_size=None):
+        """Fetches all active courses (None if the API call failed)."""
         try:
-            results = self.service.courses().list(courseStates=['ACTIVE']).execute()
-            courses = results.get('courses', [])
-            return courses
+            return list(self.iter_courses(page_size=page_size))
         except HttpError as error:
             print(f"An error occurred: {error}")
-            return []
+            return None
 
-    def get_course_work(self, course_id):
-        """Fetches all coursework AND materials for a course."""
-        try:
-            # 1. Fetch Assignments/Quizzes
-            results = self.service.courses().courseWork().list(courseId=course_id).execute()
-            works = results.get('courseWork', [])
-            
-            # 2. Fetch Materials (Slides, Books, etc.)
-            mat_results = self.service.courses().courseWorkMaterials().list(courseId=course_id).execute()
-            materials = mat_results.get('courseWorkMaterial', [])
-            
-            # Merge lists
-            all_items = works + materials
+    def _process_items(self, all_items):
+        """Turns raw courseWork / courseWorkMaterial resources into display dicts."""
+        all_items = list(all_items)
+        
+        # Smart Parsing
+        if len(all_items) >= BATCH_PARSE_MIN_ITEMS:
+            parsed = self.parser.parse_batch(
+                [work.get('title', '') for work in all_items],
+                [work.get('description') for work in all_items]
+            )
+            all_metadata = [
+                {'category': category, 'index': None if pd.isna(index) else int(index), 'topic': topic}
+                for category, index, topic in zip(parsed['category'], parsed['index'], parsed['topic'])
+            ]
+        else:
+            all_metadata = [self.parser.parse_item(work.get('title', ''), work.get('description')) for work in all_items]
+        
+        processed_works = []
+        for work, metadata in zip(all_items, all_metadata):
+            # Determine Type
+            # If it came from courseWorkMaterials, force type to LECTURE/MATERIAL unless parsed otherwise
+            is_material = 'dueTime' not in work and 'dueDate' not in work and 'workType' not in work
             
-            processed_works = []
-            for work in all_items:
-                # Smart Parsing
-                title = work.get('title', '')
-                metadata = self.parser.parse_item(title, work.get('description'))
-                
-                # Determine Type
-                # If it came from courseWorkMaterials, force type to LECTURE/MATERIAL unless parsed otherwise
-                is_material = 'dueTime' not in work and 'dueDate' not in work and 'workType' not in work
-                
-                if is_material:
-                    if metadata['category'] == 'UNCATEGORIZED':
-                        display_type = 'MATERIAL'
-                    else:
-                        display_type = metadata['category']
+            if is_material:
+                if metadata['category'] == 'UNCATEGORIZED':
+                    display_type = 'MATERIAL'
                 else:
                     display_type = metadata['category']
+            else:
+                display_type = metadata['category']
 
-                # Deadline formatting
-                due_date = work.get('dueDate')
-                due_time = work.get('dueTime')
-                deadline = None
-                
-                if due_date:
-                    year = due_date.get('year')
-                    month = due_date.get('month')
-                    day = due_date.get('day')
-                    # Default to end of day if no time specified
-                    hour = due_time.get('hours', 23) if due_time else 23
-                    minute = due_time.get('minutes', 59) if due_time else 59
-                    # Google Classroom dates are in UTC by default if not specified, 
-                    # but usually the API returns them as naive. We treat them as UTC for conversion.
-                    deadline = datetime(year, month, day, hour, minute, tzinfo=pytz.utc)
-                elif 'creationTime' in work:
-                    # For materials without deadline, use creation time for sorting
-                    pass
-
-                processed_works.append({
-                    'id': work['id'],
-                    'title': work['title'],
-                    'description': work.get('description', ''),
-                    'type': display_type,
-                    'index': metadata['index'],
-                    'topic': metadata['topic'],
-                    'deadline': deadline,
-                    'creationTime': work.get('creationTime'), # Useful for sorting materials
-                    'link': work.get('alternateLink'),
-                    'materials': work.get('materials', []),
-                    'max_points': work.get('maxPoints'),
-                    'workType': work.get('workType', 'MATERIAL' if is_material else 'ASSIGNMENT')
-                })
+            # Deadline formatting
+            due_date = work.get('dueDate')
+            due_time = work.get('dueTime')
+            deadline = None
+            
+            if due_date:
+                year = due_date.get('year')
+                month = due_date.get('month')
+                day = due_date.get('day')
+                # Default to end of day if no time specified
+                hour = due_time.get('hours', 23) if due_time else 23
+                minute = due_time.get('minutes', 59) if due_time else 59
+                # Google Classroom dates are in UTC by default if not specified, 
+                # but usually the API returns them as naive. We treat them as UTC for conversion.
+                deadline = datetime(year, month, day, hour, minute, tzinfo=pytz.utc)
+            elif 'creationTime' in work:
+                # For materials without deadline, use creation time for sorting
+                pass
+
+            processed_works.append({
+                'id': work['id'],
+                'title': work['title'],
+                'description': work.get('description', ''),
+                'type': display_type,
+                'index': metadata['index'],
+                'topic': metadata['topic'],
+                'deadline': deadline,
+                'creationTime': work.get('creationTime'), # Useful for sorting materials
+                'link': work.get('alternateLink'),
+                'materials': work.get('materials', []),
+                'max_points': work.get('maxPoints'),
+                'workType': work.get('workType', 'MATERIAL' if is_material else 'ASSIGNMENT'),
+                'updateTime': work.get('updateTime') # Watermark for incremental sync
+            })
+            
+        return processed_works
+
+    def _course_work_listings(self, include_work=True, include_materials=True):
+        """(list method, items key) pairs: 1. Assignments/Quizzes, 2. Materials (Slides, Books, etc.)"""
+        listings = []
+        if include_work:
+            listings.append((self.service.courses().courseWork().list, 'courseWork'))
+        if include_materials:
+            listings.append((self.service.courses().courseWorkMaterials().list, 'courseWorkMaterial'))
+        return listings
+
+    def iter_course_work(self, course_id, page_size=None, include_work=True, include_materials=True,
+                         profile=DEFAULT_PROFILE):
+        """Lazily yields raw coursework, then raw materials, for a course."""
+        for list_method, items_key in self._course_work_listings(include_work, include_materials):
+            yield from iter_items(
+                list_method, items_key,
+                courseId=course_id, page_size=page_size, fields=work_fields(items_key, profile),
+                http=self._http(), num_retries=NUM_RETRIES
+            )
+
+    def get_course_work(self, course_id, page_size=None, include_work=True, include_materials=True,
+                        profile=DEFAULT_PROFILE):
+        """Fetches all coursework AND materials for a course.
+
+        Pass include_work=False or include_materials=False to fetch only one of the two listings.
+        profile: field-mask profile (see COURSE_WORK_PROFILES); lighter profiles leave
+        description / materials empty.
+        Returns None if the API call failed (an empty list means there is nothing).
+        """
+        try:
+            return self._process_items(self.iter_course_work(
+                course_id, page_size=page_size,
+                include_work=include_work, include_materials=include_materials, profile=profile
+            ))
+        except HttpError as error:
+            print(f"An error occurred: {error}")
+            return None
+
+    def sync_course_work(self, course_id, previous=None, include_work=True, include_materials=True,
+                         profile=DEFAULT_PROFILE):
+        """Incrementally refreshes processed coursework using updateTime watermarks.
+
+        previous: works list from an earlier get_course_work / sync_course_work call.
+        Only items updated since the newest updateTime in ``previous`` are fetched in
+        full and re-parsed (newest first, stopping at the watermark); a lightweight
+        id-only listing detects removals. Unchanged items are reused as-is.
+
+        Returns (works, changes), where changes holds 'added', 'changed' and
+        'removed' lists of item ids. ``previous`` must have been fetched with the same profile.
+        Returns (None, None) if the API call failed.
+        """
+        if not previous:
+            works = self.get_course_work(
+                course_id, include_work=include_work, include_materials=include_materials, profile=profile
+            )
+            if works is None:
+                return None, None
+            return works, {'added': [w['id'] for w in works], 'changed': [], 'removed': []}
+        
+        previous_by_id = {w['id']: w for w in previous}
+        stamps = [dateutil.parser.isoparse(w['updateTime']) for w in previous if w.get('updateTime')]
+        # Items cached before updateTime was tracked have no watermark: resync everything
+        watermark = max(stamps) if len(stamps) == len(previous) else None
+        
+        current_ids = []
+        changed_items = []
+        try:
+            for list_method, items_key in self._course_work_listings(include_work, include_materials):
+                current_ids.extend(item['id'] for item in iter_items(
+                    list_method, items_key,
+                    courseId=course_id, fields=f'nextPageToken,{items_key}(id)',
+                    http=self._http(), num_retries=NUM_RETRIES
+                ))
                 
-            return processed_works
+                for item in iter_items(
+                    list_method, items_key,
+                    courseId=course_id, orderBy='updateTime desc', fields=work_fields(items_key, profile),
+                    http=self._http(), num_retries=NUM_RETRIES
+                ):
+                    # Strictly older than the watermark: everything after this is unchanged
+                    if watermark and item.get('updateTime') and dateutil.parser.isoparse(item['updateTime']) < watermark:
+                        break
+                    changed_items.append(item)
         except HttpError as error:
             print(f"An error occurred: {error}")
-            return []
+            return None, None
+        
+        processed = {w['id']: w for w in self._process_items(changed_items)}
+        
+        # Keep listing order; anything created between the two listings goes first
+        listed = set(current_ids)
+        ordered_ids = [i for i in processed if i not in listed] + current_ids
+        works = [processed.get(i) or previous_by_id[i] for i in ordered_ids if i in processed or i in previous_by_id]
+        
+        live_ids = set(ordered_ids)
+        changes = {
+            'added': [i for i in processed if i not in previous_by_id],
+            'changed': [
+                i for i, w in processed.items()
+                if i in previous_by_id and w['updateTime'] != previous_by_id[i].get('updateTime')
+            ],
+            'removed': [i for i in previous_by_id if i not in live_ids]
+        }
+        return works, changes
+
+    def get_all_course_work(self, course_ids, max_workers=DEFAULT_MAX_WORKERS, profile=DEFAULT_PROFILE):
+        """Fetches coursework for several courses concurrently.
+
+        Returns one works list per course id, in the same order as ``course_ids``
+        (None for a course whose fetch failed).
+        ``max_workers`` is clamped to ``MAX_WORKERS_LIMIT``; 1 fetches serially.
+        """
+        course_ids = list(course_ids)
+        max_workers = max(1, min(int(max_workers), MAX_WORKERS_LIMIT))
+        
+        if max_workers == 1 or len(course_ids) <= 1:
+            return [self.get_course_work(course_id, profile=profile) for course_id in course_ids]
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda course_id: self.get_course_work(course_id, profile=profile), course_ids))
+
+    def get_course_work_batch(self, course_ids, profile=DEFAULT_PROFILE):
+        """Fetches coursework AND materials for many courses using batch HTTP requests.
+
+        The courseWork and courseWorkMaterials list calls for every course are
+        packed into batches of ``BATCH_SIZE`` sub-requests, so a full dashboard
+        load takes a handful of round-trips instead of two per course.
+        Sub-requests that fail (e.g. rate limited) are retried one by one with backoff.
+        Returns one works list per course id, in the same order as ``course_ids``
+        (None for a course that still couldn't be fetched).
+        """
+        course_ids = list(course_ids)
+        raw = {course_id: {'courseWork': [], 'courseWorkMaterial': []} for course_id in course_ids}
+        list_methods = {
+            'courseWork': self.service.courses().courseWork().list,
+            'courseWorkMaterial': self.service.courses().courseWorkMaterials().list,
+        }
+        next_pages = []
+        failed = []
+        
+        def on_response(request_id, response, exception):
+            course_id, items_key = request_id.split('|', 1)
+            if exception is not None:
+                failed.append((course_id, items_key, None))
+                return
+            raw[course_id][items_key] = response.get(items_key, [])
+            if response.get('nextPageToken'):
+                next_pages.append((course_id, items_key, response['nextPageToken']))
+        
+        requests = []
+        for course_id in course_ids:
+            for items_key, list_method in list_methods.items():
+                requests.append((
+                    f"{course_id}|{items_key}",
+                    list_method(courseId=course_id, fields=work_fields(items_key, profile))
+                ))
+        
+        for start in range(0, len(requests), BATCH_SIZE):
+            chunk = requests[start:start + BATCH_SIZE]
+            http = self._http()
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for request_id, request in chunk:
+                # Sub-requests are authorized with their own transport, not the batch's
+                request.http = http
+                batch.add(request, request_id=request_id)
+            try:
+                batch.execute(http=http)
+            except HttpError as error:
+                print(f"An error occurred: {error}")
+                failed.extend((*request_id.split('|', 1), None) for request_id, _ in chunk)
+        
+        # Failed sub-requests are listed from the start, large courses page on from
+        # where the batch stopped; both with the usual retries and backoff
+        unavailable = set()
+        for course_id, items_key, page_token in list(dict.fromkeys(failed)) + next_pages:
+            try:
+                items = list(iter_items(
+                    list_methods[items_key], items_key,
+                    courseId=course_id, page_token=page_token, fields=work_fields(items_key, profile),
+                    http=self._http(), num_retries=NUM_RETRIES
+                ))
+                if page_token:
+                    raw[course_id][items_key].extend(items)
+                else:
+                    raw[course_id][items_key] = items
+            except HttpError as error:
+                print(f"An error occurred: {error}")
+                unavailable.add(course_id)
+        
+        return [
+            None if course_id in unavailable
+            else self._process_items(raw[course_id]['courseWork'] + raw[course_id]['courseWorkMaterial'])
+            for course_id in course_ids
+        ]
 
     def get_my_submissions(self, course_id, course_work_id):
         """Fetches user's submission and grades."""
@@ -173,8 +464,9 @@ class ClassroomClient:
             results = self.service.courses().courseWork().studentSubmissions().list(
                 courseId=course_id,
                 courseWorkId=course_work_id,
-                userId='me'
-            ).execute()
+                userId='me',
+                fields=SUBMISSION_FIELDS
+            ).execute(http=self._http(), num_retries=NUM_RETRIES)
             submissions = results.get('studentSubmissions', [])
             if submissions:
                 sub = submissions[0]
@@ -186,3 +478,29 @@ class ClassroomClient:
             return None
         except HttpError as error:
             return None
+
+    def get_all_my_submissions(self, course_id):
+        """Fetches the user's submissions for every coursework item in a course.
+
+        Uses the '-' wildcard courseWorkId so a whole course is listed in one
+        paginated call instead of one call per coursework item.
+        Returns a dict keyed by courseWorkId in the get_my_submissions format,
+        or None if the API call failed.
+        """
+        submissions = {}
+        try:
+            for sub in iter_items(
+                self.service.courses().courseWork().studentSubmissions().list, 'studentSubmissions',
+                courseId=course_id, courseWorkId='-', userId='me', fields=f'nextPageToken,{SUBMISSION_FIELDS}',
+                http=self._http(), num_retries=NUM_RETRIES
+            ):
+                submissions[sub['courseWorkId']] = {
+                    'state': sub.get('state'),
+                    'assigned_grade': sub.get('assignedGrade'),
+                    'draft_grade': sub.get('draftGrade'),
+                    'update_time': sub.get('updateTime')
+                }
+            return submissions
+        except HttpError as error:
+            print(f"An error occurred: {error}")
+            return None
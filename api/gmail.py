@@ -1,11 +1,12 @@
 import base64
 from email.message import EmailMessage
-from googleapiclient.discovery import build
+from api.services import get_service, authorized_http
 from googleapiclient.errors import HttpError
 
 class GmailClient:
     def __init__(self, creds):
-        self.service = build('gmail', 'v1', credentials=creds)
+        self.creds = creds
+        self.service = get_service('gmail', 'v1', creds)
 
     def create_draft(self, to_email, subject, body):
         """Creates a draft email."""
@@ -23,7 +24,9 @@ class GmailClient:
                 }
             }
 
-            draft = self.service.users().drafts().create(userId="me", body=create_message).execute()
+            draft = self.service.users().drafts().create(userId="me", body=create_message).execute(
+                http=authorized_http(self.creds)
+            )
             return draft
         except HttpError as error:
             print(f"An error occurred: {error}")
@@ -0,0 +1,177 @@
+import time
+import pandas as pd
+from api.classroom import DEFAULT_MAX_WORKERS
+from api.store import _write_lock
+from utils.grading_engine import load_policies, match_course_policy, categorize_assignment
+from utils.policy_registry import get_policy_registry
+
+# Columns of GradeTable.frame(), in order
+GRADE_COLUMNS = ['CourseId', 'Course', 'CourseWorkId', 'Assignment', 'Category', 'Due',
+                 'Grade', 'Max', 'Percentage', 'State', 'Updated']
+
+class GradeTable:
+    """Materialized table of the user's grades in every course, kept in the CourseStore database.
+
+    refresh() brings it up to date incrementally: a row is only rewritten when its
+    coursework or submission ``updateTime`` changed (or the grading policies did),
+    so dashboards read one local table instead of refetching each course.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.namespace = store.namespace
+        self._connect = store._connect
+        self._init_db()
+
+    def _init_db(self):
+        with _write_lock, self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS grades (
+                    namespace TEXT NOT NULL,
+                    course_id TEXT NOT NULL,
+                    course_work_id TEXT NOT NULL,
+                    course_name TEXT,
+                    assignment TEXT,
+                    category TEXT,
+                    due TEXT,
+                    assigned_grade REAL,
+                    max_points REAL,
+                    percentage REAL,
+                    state TEXT,
+                    work_updated TEXT,
+                    submission_updated TEXT,
+                    PRIMARY KEY (namespace, course_id, course_work_id)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS grade_courses (
+                    namespace TEXT NOT NULL,
+                    course_id TEXT NOT NULL,
+                    policy_version TEXT,
+                    synced_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, course_id)
+                )
+            """)
+
+    def refresh(self, courses=None, max_workers=DEFAULT_MAX_WORKERS):
+        """Brings every course's rows up to date. Returns the number of rows written or removed."""
+        if courses is None:
+            courses = self.store.get_courses()
+        if not courses:
+            return 0
+
+        course_ids = [course['id'] for course in courses]
+        works = self.store.get_all_course_work(course_ids, profile='grades')
+        submissions = self.store.get_all_submissions(course_ids, max_workers=max_workers)
+
+        self._prune(course_ids)
+        policies = load_policies()
+        policy_version = str(get_policy_registry().version)
+        # A course that couldn't be fetched keeps its rows until the next refresh
+        return sum(
+            self._refresh_course(course, course_works, course_submissions, policies, policy_version)
+            for course, course_works, course_submissions in zip(courses, works, submissions)
+            if course_works is not None and course_submissions is not None
+        )
+
+    def _refresh_course(self, course, works, submissions, policies, policy_version):
+        course_id = course['id']
+        with self._connect() as conn:
+            stamps = {
+                row[0]: (row[1], row[2]) for row in conn.execute(
+                    "SELECT course_work_id, work_updated, submission_updated FROM grades WHERE namespace=? AND course_id=?",
+                    (self.namespace, course_id)
+                )
+            }
+            synced = conn.execute(
+                "SELECT policy_version FROM grade_courses WHERE namespace=? AND course_id=?",
+                (self.namespace, course_id)
+            ).fetchone()
+        # New policies can change every category, so the whole course is recategorized
+        policy_changed = synced is None or synced[0] != policy_version
+        policy = match_course_policy(course['name'], policies)
+
+        rows = []
+        current = set()
+        for work in works:
+            if not work.get('max_points'):
+                continue
+            current.add(work['id'])
+            sub = submissions.get(work['id']) or {}
+            stamp = (work.get('updateTime'), sub.get('update_time'))
+            if not policy_changed and stamps.get(work['id']) == stamp:
+                continue
+
+            grade = sub.get('assigned_grade')
+            rows.append((
+                self.namespace, course_id, work['id'], course['name'], work['title'],
+                categorize_assignment(work['title'], policy['policy'].keys()) if policy else "Uncategorized",
+                work['deadline'].isoformat() if work.get('deadline') else None,
+                grade, work['max_points'],
+                grade / work['max_points'] * 100 if grade is not None else None,
+                sub.get('state'), *stamp
+            ))
+        removed = [(self.namespace, course_id, work_id) for work_id in stamps if work_id not in current]
+
+        with _write_lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO grades VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            conn.executemany(
+                "DELETE FROM grades WHERE namespace=? AND course_id=? AND course_work_id=?", removed
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO grade_courses (namespace, course_id, policy_version, synced_at) VALUES (?, ?, ?, ?)",
+                (self.namespace, course_id, policy_version, time.time())
+            )
+        return len(rows) + len(removed)
+
+    def _prune(self, course_ids):
+        """Drops the rows of courses that are no longer active (e.g. archived)."""
+        placeholders = ','.join('?' * len(course_ids))
+        with _write_lock, self._connect() as conn:
+            for table in ('grades', 'grade_courses'):
+                conn.execute(
+                    f"DELETE FROM {table} WHERE namespace=? AND course_id NOT IN ({placeholders})",
+                    [self.namespace, *course_ids]
+                )
+
+    def last_synced(self, course_ids=None):
+        """Time (epoch seconds) of the oldest refresh among these courses (default: all),
+        or None if any of them was never synced."""
+        query = "SELECT MIN(synced_at), COUNT(*) FROM grade_courses WHERE namespace=?"
+        params = [self.namespace]
+        if course_ids is not None:
+            course_ids = list(course_ids)
+            query += f" AND course_id IN ({','.join('?' * len(course_ids))})"
+            params.extend(course_ids)
+        with self._connect() as conn:
+            oldest, synced = conn.execute(query, params).fetchone()
+        if course_ids is not None and synced < len(set(course_ids)):
+            return None
+        return oldest
+
+    def frame(self, course_ids=None):
+        """The table as a DataFrame with GRADE_COLUMNS (Percentage is NaN for ungraded work)."""
+        query = """
+            SELECT course_id, course_name, course_work_id, assignment, category, due,
+                   assigned_grade, max_points, percentage, state, submission_updated
+            FROM grades WHERE namespace=?
+        """
+        params = [self.namespace]
+        if course_ids is not None:
+            course_ids = list(course_ids)
+            query += f" AND course_id IN ({','.join('?' * len(course_ids))})"
+            params.extend(course_ids)
+        with self._connect() as conn:
+            df = pd.read_sql_query(query + " ORDER BY course_name, due", conn, params=params)
+        df.columns = GRADE_COLUMNS
+        df['Due'] = pd.to_datetime(df['Due'], utc=True)
+        df['Updated'] = pd.to_datetime(df['Updated'], utc=True)
+        return df
+
+    def clear(self):
+        """Drops every row for this account (the next refresh rebuilds the table)."""
+        with _write_lock, self._connect() as conn:
+            conn.execute("DELETE FROM grades WHERE namespace=?", (self.namespace,))
+            conn.execute("DELETE FROM grade_courses WHERE namespace=?", (self.namespace,))
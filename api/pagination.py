@@ -0,0 +1,42 @@
+def iter_pages(list_method, page_size=None, page_size_param='pageSize', page_token=None,
+               http=None, num_retries=0, **kwargs):
+    """Lazily yields raw response pages from a Google API list method.
+
+    list_method: an unbound list callable, e.g. ``service.courses().list``
+    page_size: items per page (sent as ``page_size_param``; Calendar uses 'maxResults')
+    page_token: resume from a nextPageToken returned by an earlier call
+    Any other kwargs are passed straight to ``list_method``.
+
+    The next page is only requested once the caller asks for it, so breaking
+    out of the loop stops further HTTP calls.
+    """
+    if page_size:
+        kwargs[page_size_param] = page_size
+
+    while True:
+        if page_token:
+            kwargs['pageToken'] = page_token
+        response = list_method(**kwargs).execute(http=http, num_retries=num_retries)
+        yield response
+
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            break
+
+
+def iter_items(list_method, items_key, limit=None, **kwargs):
+    """Lazily yields individual items (``response[items_key]``) across all pages.
+
+    limit: stop after this many items, without fetching any further pages.
+    Remaining kwargs are the same as for iter_pages.
+    """
+    if limit is not None and limit <= 0:
+        return
+
+    count = 0
+    for page in iter_pages(list_method, **kwargs):
+        for item in page.get(items_key, []):
+            yield item
+            count += 1
+            if limit is not None and count >= limit:
+                return
@@ -0,0 +1,114 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+import httplib2
+import google_auth_httplib2
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.errors import UnknownApiNameOrVersion
+
+# Discovery documents that are not bundled with googleapiclient are cached here
+DISCOVERY_CACHE_DIR = os.path.join(".cache", "discovery")
+DISCOVERY_URL = "https://{api}.googleapis.com/$discovery/rest?version={apiVersion}"
+
+# Built services kept alive (LRU), shared by every page and rerun in the process
+MAX_SERVICES = 32
+
+_services = OrderedDict()
+_lock = threading.Lock()
+
+# Per-thread authorized transports, keyed by account
+_transports = threading.local()
+
+
+def credential_key(creds):
+    """Stable per-account key derived from the OAuth credentials."""
+    secret = getattr(creds, 'refresh_token', None) or getattr(creds, 'token', None) or ''
+    return hashlib.sha256(secret.encode()).hexdigest()[:16]
+
+
+def _load_discovery_document(name, version):
+    """Reads a discovery document from the disk cache, downloading it once if needed."""
+    path = os.path.join(DISCOVERY_CACHE_DIR, f"{name}.{version}.json")
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    response, content = httplib2.Http().request(DISCOVERY_URL.format(api=name, apiVersion=version))
+    if response.status != 200:
+        raise UnknownApiNameOrVersion(f"name: {name}  version: {version}")
+    document = content.decode('utf-8')
+    json.loads(document)  # Don't cache a broken document
+
+    os.makedirs(DISCOVERY_CACHE_DIR, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(document)
+    return document
+
+
+def _build(name, version, creds):
+    try:
+        # Documents bundled with googleapiclient: no network round-trip at all
+        return build(name, version, credentials=creds, static_discovery=True, cache_discovery=False)
+    except UnknownApiNameOrVersion:
+        return build_from_document(_load_discovery_document(name, version), credentials=creds)
+
+
+def authorized_http(creds):
+    """Authorized HTTP transport for these credentials, owned by the calling thread.
+
+    Services are shared across sessions and threads, but httplib2 connections
+    are not thread-safe, so requests must run with ``execute(http=authorized_http(creds))``
+    rather than on the service's own transport.
+    """
+    cache = getattr(_transports, 'by_account', None)
+    if cache is None:
+        cache = _transports.by_account = {}
+    key = credential_key(creds)
+    http = cache.get(key)
+    if http is None or http.credentials is not creds:
+        http = cache[key] = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http())
+    return http
+
+
+def get_service(name, version, creds):
+    """Returns the API service for these credentials, building it only once.
+
+    Parsing the discovery document is the slow part of build(), so services
+    are kept per (account, API, version) and reused across Streamlit reruns
+    and pages. Execute its requests with ``http=authorized_http(creds)``.
+    """
+    key = (credential_key(creds), name, version)
+    with _lock:
+        service = _services.get(key)
+        if service is not None:
+            _services.move_to_end(key)
+            return service
+
+    service = _build(name, version, creds)
+
+    with _lock:
+        # Another thread may have built it meanwhile; keep the first one
+        service = _services.setdefault(key, service)
+        _services.move_to_end(key)
+        while len(_services) > MAX_SERVICES:
+            _services.popitem(last=False)
+    return service
+
+
+def clear_services(creds=None):
+    """Forgets built services (for one account, or all of them), e.g. after logout."""
+    cache = getattr(_transports, 'by_account', None)
+    if cache is not None:
+        if creds is None:
+            cache.clear()
+        else:
+            cache.pop(credential_key(creds), None)
+    with _lock:
+        if creds is None:
+            _services.clear()
+            return
+        account = credential_key(creds)
+        for key in [k for k in _services if k[0] == account]:
+            del _services[key]
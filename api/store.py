@@ -0,0 +1,309 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+import dateutil.parser
+from api.classroom import DEFAULT_MAX_WORKERS, COURSE_WORK_PROFILES, DEFAULT_PROFILE
+from api.services import credential_key
+
+DB_PATH = "classroom_cache.db"
+
+# Seconds before a cached entity is considered stale
+DEFAULT_TTLS = {
+    'courses': 24 * 60 * 60,
+    'coursework': 15 * 60,
+    'materials': 60 * 60,
+    'submissions': 10 * 60,
+}
+
+# Background refreshes currently queued or running, shared by every store in the process
+_inflight = set()
+_inflight_lock = threading.Lock()
+# Runs them, as many at once as a foreground fan-out (keeps Classroom calls within quota)
+_refresh_pool = ThreadPoolExecutor(max_workers=DEFAULT_MAX_WORKERS, thread_name_prefix='store-refresh')
+
+_initialized_dbs = set()
+_write_lock = threading.Lock()
+_changes_lock = threading.Lock()
+
+
+def _encode(value):
+    """json.dumps default hook: keeps datetimes (e.g. deadlines) round-trippable."""
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode(obj):
+    if '__datetime__' in obj:
+        return dateutil.parser.isoparse(obj['__datetime__'])
+    return obj
+
+
+def _profile_key(course_id, profile):
+    """Entity key for coursework fetched with a field-mask profile ('detail' keeps the plain id)."""
+    return course_id if profile == DEFAULT_PROFILE else f"{course_id}:{profile}"
+
+
+def _covering_profiles(profile):
+    """The profile itself, then every richer profile whose data also serves it."""
+    profiles = list(COURSE_WORK_PROFILES)
+    return profiles[profiles.index(profile):]
+
+
+class CourseStore:
+    """Local SQLite store for Classroom data, shared by every page.
+
+    Reads go through the store: fresh rows are returned as-is, stale rows are
+    returned immediately and refreshed on a background thread
+    (stale-while-revalidate), and only missing rows block on the API.
+    """
+
+    def __init__(self, client, db_path=DB_PATH, ttls=None):
+        self.client = client
+        self.db_path = db_path
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.namespace = credential_key(client.creds)
+        self._init_db()
+
+    @contextmanager
+    def _connect(self):
+        """Short-lived connection (commits on success), so any thread can use the store."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        if self.db_path in _initialized_dbs:
+            return
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with _write_lock, self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entities (
+                    namespace TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, kind, key)
+                )
+            """)
+        _initialized_dbs.add(self.db_path)
+
+    def _read(self, kind, key):
+        """Returns (payload, fetched_at) or None if the entity was never stored."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT payload, fetched_at FROM entities WHERE namespace=? AND kind=? AND key=?",
+                (self.namespace, kind, key)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0], object_hook=_decode), row[1]
+
+    def _write(self, kind, key, payload):
+        data = json.dumps(payload, default=_encode)
+        with _write_lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entities (namespace, kind, key, payload, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, kind, key, data, time.time())
+            )
+
+    def _is_fresh(self, kind, fetched_at):
+        return time.time() - fetched_at < self.ttls.get(kind, 0)
+
+    def _refresh(self, kind, key, fetch):
+        """Fetches and stores an entity. A failed fetch (None) is returned but never stored."""
+        payload = fetch()
+        if payload is not None:
+            self._write(kind, key, payload)
+        return payload
+
+    def _refresh_in_background(self, kind, key, fetch):
+        job = (self.db_path, self.namespace, kind, key)
+        with _inflight_lock:
+            if job in _inflight:
+                return
+            _inflight.add(job)
+
+        def run():
+            try:
+                payload = fetch()
+                # A failed refresh (None) keeps the cached data; an empty result is stored
+                if payload is not None:
+                    self._write(kind, key, payload)
+            except Exception as e:
+                print(f"Background refresh failed for {kind}/{key}: {e}")
+            finally:
+                with _inflight_lock:
+                    _inflight.discard(job)
+
+        _refresh_pool.submit(run)
+
+    def _read_through(self, kind, key, fetch):
+        """The entity, fetched only if missing or stale. None if it's missing and the fetch failed."""
+        cached = self._read(kind, key)
+        if cached is None:
+            return self._refresh(kind, key, fetch)
+
+        payload, fetched_at = cached
+        if not self._is_fresh(kind, fetched_at):
+            self._refresh_in_background(kind, key, fetch)
+        return payload
+
+    def get_courses(self):
+        """Active courses ([] if they couldn't be fetched)."""
+        return self._read_through('courses', 'active', self.client.get_courses) or []
+
+    def _sync(self, kind, course_id, profile=DEFAULT_PROFILE):
+        """Incrementally refreshes one coursework entity from its cached copy."""
+        cached = self._read(kind, _profile_key(course_id, profile))
+        previous = cached[0] if cached else None
+        works, changes = self.client.sync_course_work(
+            course_id, previous,
+            include_work=kind == 'coursework',
+            include_materials=kind == 'materials',
+            profile=profile
+        )
+        if works is None:
+            return None
+        # The very first fetch is not "new" to the user, so only record later deltas
+        if previous is not None and any(changes.values()):
+            self._record_changes(course_id, changes)
+        return works
+
+    def _record_changes(self, course_id, changes):
+        """Accumulates sync deltas until pop_changes() consumes them."""
+        with _changes_lock:
+            cached = self._read('changes', course_id)
+            pending = cached[0] if cached else {'added': [], 'changed': [], 'removed': []}
+            for field, ids in changes.items():
+                pending[field].extend(i for i in ids if i not in pending[field])
+            self._write('changes', course_id, pending)
+
+    def _cached_profile(self, kind, course_id, profile):
+        """The profile to serve a read from: a cached covering profile if any, else the requested one."""
+        for candidate in _covering_profiles(profile):
+            if self._read(kind, _profile_key(course_id, candidate)) is not None:
+                return candidate
+        return profile
+
+    def _read_work(self, kind, course_id, profile):
+        profile = self._cached_profile(kind, course_id, profile)
+        return self._read_through(
+            kind, _profile_key(course_id, profile),
+            lambda: self._sync(kind, course_id, profile)
+        )
+
+    def _course_work(self, course_id, profile):
+        """Coursework AND materials for a course, or None if either couldn't be fetched."""
+        works = self._read_work('coursework', course_id, profile)
+        materials = self._read_work('materials', course_id, profile)
+        if works is None or materials is None:
+            return None
+        return works + materials
+
+    def get_course_work(self, course_id, profile=DEFAULT_PROFILE):
+        """Processed coursework AND materials for a course (same format as ClassroomClient).
+
+        profile: field-mask profile of the calling view (see COURSE_WORK_PROFILES).
+        Data cached for a richer profile is reused for lighter ones.
+        Returns [] if nothing is cached and the fetch failed (use get_all_course_work
+        to tell the two apart).
+        """
+        return self._course_work(course_id, profile) or []
+
+    def get_materials(self, course_id, profile=DEFAULT_PROFILE):
+        """Processed courseWorkMaterials for a course."""
+        return self._read_work('materials', course_id, profile) or []
+
+    def sync_course_work(self, course_id):
+        """Forces an incremental sync of a course now and returns its works."""
+        works = self._refresh('coursework', course_id, lambda: self._sync('coursework', course_id))
+        materials = self._refresh('materials', course_id, lambda: self._sync('materials', course_id))
+        return (works or []) + (materials or [])
+
+    def pop_changes(self, course_id):
+        """Returns and clears the added / changed / removed item ids seen since the last call."""
+        with _changes_lock:
+            cached = self._read('changes', course_id)
+            self.invalidate('changes', course_id)
+        return cached[0] if cached else {'added': [], 'changed': [], 'removed': []}
+
+    def _submissions(self, course_id):
+        return self._read_through(
+            'submissions', course_id,
+            lambda: self.client.get_all_my_submissions(course_id)
+        )
+
+    def get_submissions(self, course_id):
+        """The user's submissions for a course, keyed by courseWorkId ({} if they couldn't be fetched)."""
+        return self._submissions(course_id) or {}
+
+    def get_all_submissions(self, course_ids, max_workers=DEFAULT_MAX_WORKERS):
+        """Submissions dicts for several courses (fetched concurrently where missing),
+        in the same order as ``course_ids``. None for a course whose fetch failed.
+        """
+        course_ids = list(course_ids)
+        if not course_ids:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(course_ids)))) as executor:
+            return list(executor.map(self._submissions, course_ids))
+
+    def get_all_course_work(self, course_ids, fetch_mode="Batch", max_workers=DEFAULT_MAX_WORKERS,
+                            profile=DEFAULT_PROFILE):
+        """Works lists for several courses, in the same order as ``course_ids``.
+
+        Courses with nothing cached yet are fetched together (batch or parallel)
+        instead of one blocking call per course. A course whose coursework could not
+        be fetched is None (not []), so callers can tell a failure from an empty course.
+        """
+        course_ids = list(course_ids)
+        missing = [
+            course_id for course_id in course_ids
+            if any(
+                all(self._read(kind, _profile_key(course_id, p)) is None for p in _covering_profiles(profile))
+                for kind in ('coursework', 'materials')
+            )
+        ]
+
+        if missing:
+            if fetch_mode == "Batch":
+                fetched = self.client.get_course_work_batch(missing, profile=profile)
+            else:
+                fetched = self.client.get_all_course_work(missing, max_workers=max_workers, profile=profile)
+
+            for course_id, works in zip(missing, fetched):
+                if works is None:
+                    # Failed: nothing is stored, so the per-course read below tries once more
+                    continue
+                # Split back into the two entities; materials are tagged workType 'MATERIAL'
+                key = _profile_key(course_id, profile)
+                self._write('coursework', key, [w for w in works if w['workType'] != 'MATERIAL'])
+                self._write('materials', key, [w for w in works if w['workType'] == 'MATERIAL'])
+
+        return [self._course_work(course_id, profile) for course_id in course_ids]
+
+    def invalidate(self, kind=None, key=None):
+        """Drops cached rows (all of them, one kind, or a single entity) for this account."""
+        query = "DELETE FROM entities WHERE namespace=?"
+        params = [self.namespace]
+        if kind:
+            query += " AND kind=?"
+            params.append(kind)
+        if key:
+            # Including the coursework / materials rows of every field-mask profile
+            query += " AND (key=? OR key LIKE ?)"
+            params.extend([key, f"{key}:%"])
+        with _write_lock, self._connect() as conn:
+            conn.execute(query, params)
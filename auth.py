@@ -6,6 +6,7 @@ from google_auth_oauthlib.flow import Flow
 from google.auth.transport.requests import Request
 import json
 from datetime import datetime, timedelta
+from api.services import clear_services
 
 # Relax scope validation
 os.environ['OAUTHLIB_RELAX_TOKEN_SCOPE'] = '1'
@@ -31,6 +32,13 @@ def get_cookie_manager():
         st.session_state.cookie_manager = stx.CookieManager()
     return st.session_state.cookie_manager
 
+def logout():
+    """Signs out: forgets the session credentials, the login cookie and the account's API services"""
+    creds = st.session_state.pop('credentials', None)
+    if creds is not None:
+        clear_services(creds)
+    get_cookie_manager().delete('classroom_token', key="delete_token")
+
 def authenticate():
     """
     Handles authentication for Web Deployment.
@@ -53,6 +61,8 @@ def authenticate():
                 cookie_manager.set('classroom_token', creds.to_json(), key="set_token")
                 return creds
             except:
+                # Revoked or expired for good: drop the services built for it too
+                clear_services(creds)
                 st.session_state.credentials = None
 
     # 3. Check Cookies (Remember Me)
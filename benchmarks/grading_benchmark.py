@@ -0,0 +1,125 @@
+"""
+Benchmark: the original per-course calculate_weighted_grade vs the current
+per-course loop and calculate_weighted_grades (all courses at once).
+
+Run from the project root:
+    python -m benchmarks.grading_benchmark [courses]
+
+Grades `courses` (default 2,000) synthetic courses against the policies in
+grading_policies.json with all three, checks that every result is identical
+and prints timings. The frame engine only pays off for many thousands of
+courses; for one course (the Grades page) the loop is far cheaper.
+"""
+import re
+import sys
+import time
+import random
+import pandas as pd
+from utils.grading_engine import load_policies, calculate_weighted_grade, calculate_weighted_grades
+
+
+def reference_calculate_weighted_grade(grades, policy):
+    """The original calculate_weighted_grade: dict grouping, list sorts, re.search per call."""
+    total_grade = 0
+    total_weight = 0
+
+    grouped_grades = {}
+    for g in grades:
+        cat = g['Category']
+        if cat not in grouped_grades:
+            grouped_grades[cat] = []
+        grouped_grades[cat].append(g['Percentage'])
+
+    for category, weight in policy['policy'].items():
+        if category in grouped_grades:
+            scores = grouped_grades[category]
+
+            rule = policy.get('rules', {}).get(category)
+            if rule:
+                if "best" in rule:
+                    try:
+                        n = int(re.search(r'best (\d+)', rule).group(1))
+                        scores.sort(reverse=True)
+                        scores = scores[:n]
+                    except:
+                        pass
+
+            if scores:
+                avg_score = sum(scores) / len(scores)
+                total_grade += avg_score * weight
+                total_weight += weight
+
+    if total_weight > 0:
+        current_grade = (total_grade / total_weight) * 100
+        return current_grade, total_weight * 100
+    else:
+        return 0, 0
+
+
+def synthetic_grades(policies, courses, seed=42):
+    rng = random.Random(seed)
+    course_policies = {}
+    rows = []
+    for course in range(courses):
+        policy = rng.choice(policies)
+        course_policies[course] = policy
+        categories = list(policy['policy']) + ['Uncategorized']
+        for _ in range(rng.randint(0, 25)):
+            rows.append({
+                'Course': course,
+                'Category': rng.choice(categories),
+                'Percentage': rng.choice([rng.uniform(0, 100), 100.0, 87.5, 50.0])
+            })
+    return pd.DataFrame(rows, columns=['Course', 'Category', 'Percentage']), course_policies
+
+
+def main(courses=2_000):
+    policies = load_policies()
+    if not policies:
+        print("No policies found in grading_policies.json")
+        return 1
+    grades_df, course_policies = synthetic_grades(policies, courses)
+    per_course = {course: [] for course in course_policies}
+    for row in grades_df.to_dict('records'):
+        per_course[row['Course']].append(row)
+
+    start = time.perf_counter()
+    expected = {
+        course: reference_calculate_weighted_grade(per_course[course], policy)
+        for course, policy in course_policies.items()
+    }
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    looped = {
+        course: calculate_weighted_grade(per_course[course], policy)
+        for course, policy in course_policies.items()
+    }
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = calculate_weighted_grades(grades_df, course_policies)
+    vectorized_time = time.perf_counter() - start
+
+    mismatches = [
+        (course, expected[course], (row.Grade, row.WeightUsed))
+        for course, row in actual.iterrows()
+        if (row.Grade, row.WeightUsed) != expected[course]
+    ] + [
+        (course, expected[course], result)
+        for course, result in looped.items()
+        if result != expected[course]
+    ]
+    for course, e, a in mismatches[:5]:
+        print(f"MISMATCH course {course}\n  expected: {e}\n  actual:   {a}")
+
+    print(f"Courses:          {courses:,} ({len(grades_df):,} grades)")
+    print(f"Reference engine: {reference_time:.3f}s")
+    print(f"Per-course loop:  {loop_time:.3f}s ({reference_time / loop_time:.1f}x)")
+    print(f"Vectorized:       {vectorized_time:.3f}s ({reference_time / vectorized_time:.1f}x)")
+    print(f"Identical output: {'yes' if not mismatches else f'NO ({len(mismatches)} mismatches)'}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000))
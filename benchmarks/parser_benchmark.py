@@ -0,0 +1,115 @@
+"""
+Benchmark: AcademicParser.parse_item vs the original per-keyword implementation.
+
+Run from the project root:
+    python -m benchmarks.parser_benchmark [count]
+
+Parses `count` (default 100,000) synthetic coursework titles with both
+implementations (parse cache disabled), checks that every result is
+identical and prints timings, plus a rerun through a warm parse cache.
+"""
+import re
+import sys
+import time
+import random
+from utils.parser import AcademicParser, ParseCache
+
+PREFIXES = ['', 'Week 3 - ', 'Unit 2: ', 'Part B ', '[CIE 239] ', 'Final ', 'Updated: ', 'L', '#']
+KINDS = ['Quiz', 'Midterm', 'MT', 'Final Exam', 'Lab', 'Practical', 'Project Milestone', 'Proposal',
+         'Assignment', 'HW', 'Homework', 'Problem Set', 'Sheet', 'Lecture', 'Slides', 'Presentation',
+         'Notes', 'Chapter', 'Tutorial', 'Recitation', 'Grades', 'Score Report', 'Reading', 'Announcement']
+TOPICS = ['', 'Linked Lists', 'Fourier Transform', 'Normalization', 'Eigenvalues', 'Pipelining',
+          'Sorting Algorithms', 'ER Diagrams', 'Laplace', 'Finite State Machines', 'K-Maps', 'Testing']
+SEPARATORS = [' ', ' - ', ': ', '_', '#', '']
+SUFFIXES = ['', ' (pdf)', '.pdf', '.docx', ' ppt', ' v2', ' - solutions', ' :']
+
+
+def synthetic_titles(count, seed=42):
+    rng = random.Random(seed)
+    titles = []
+    for _ in range(count):
+        number = str(rng.randint(1, 15)) if rng.random() < 0.7 else ''
+        title = (rng.choice(PREFIXES) + rng.choice(KINDS) + rng.choice(SEPARATORS) + number +
+                 rng.choice(SEPARATORS) + rng.choice(TOPICS) + rng.choice(SUFFIXES))
+        if rng.random() < 0.2:
+            title = title.upper()
+        titles.append(title)
+    return titles
+
+
+def reference_parse_item(categories, title, description=""):
+    """The original parse_item: substring scans plus one re.sub per keyword."""
+    title_lower = title.lower()
+
+    category = "UNCATEGORIZED"
+    for cat, keywords in categories.items():
+        if any(k in title_lower for k in keywords):
+            category = cat
+            break
+
+    if category == 'QUIZ':
+        if any(x in title_lower for x in ['midterm', 'mt']):
+            category = 'MIDTERM'
+        elif 'final' in title_lower:
+            category = 'FINAL'
+
+    index = None
+    match = re.search(r'(?:^|\s|#|[a-z])(\d+)(?:$|\s|:)', title_lower)
+    if match:
+        index = int(match.group(1))
+
+    topic = title
+    remove_words = [k for kw in categories.values() for k in kw] + \
+                   ['week', 'unit', 'part', 'pdf', 'docx', 'ppt']
+
+    for word in remove_words:
+        topic = re.sub(r'\b' + re.escape(word) + r'\b', '', topic, flags=re.IGNORECASE)
+
+    topic = re.sub(r'\d+', '', topic).strip(' -_#:')
+    if len(topic) < 3:
+        topic = None
+
+    return {
+        'category': category,
+        'index': index,
+        'topic': topic,
+        'original_title': title
+    }
+
+
+def main(count=100_000):
+    titles = synthetic_titles(count)
+    parser = AcademicParser(cache=False)
+
+    start = time.perf_counter()
+    expected = [reference_parse_item(parser.categories, t) for t in titles]
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = [parser.parse_item(t) for t in titles]
+    compiled_time = time.perf_counter() - start
+
+    # Second pass over the same titles, as on a page rerun
+    cached_parser = AcademicParser(cache=ParseCache(max_size=count))
+    for t in titles:
+        cached_parser.parse_item(t)
+    start = time.perf_counter()
+    for t in titles:
+        cached_parser.parse_item(t)
+    cached_time = time.perf_counter() - start
+
+    mismatches = [(t, e, a) for t, e, a in zip(titles, expected, actual) if e != a]
+    for title, e, a in mismatches[:5]:
+        print(f"MISMATCH {title!r}\n  expected: {e}\n  actual:   {a}")
+
+    print(f"Titles:           {count:,}")
+    print(f"Reference parser: {reference_time:.2f}s ({count / reference_time:,.0f} titles/s)")
+    print(f"Compiled parser:  {compiled_time:.2f}s ({count / compiled_time:,.0f} titles/s)")
+    print(f"Speedup:          {reference_time / compiled_time:.1f}x")
+    print(f"Warm parse cache: {cached_time:.2f}s ({count / cached_time:,.0f} titles/s)")
+    print(f"Identical output: {'yes' if not mismatches else f'NO ({len(mismatches)} mismatches)'}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
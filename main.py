@@ -3,11 +3,14 @@ import pandas as pd
 from datetime import datetime, timedelta
 import pytz
 import dateutil.parser
-from auth import authenticate
-from api.classroom import ClassroomClient
+from auth import authenticate, logout
+from api.classroom import ClassroomClient, DEFAULT_MAX_WORKERS, MAX_WORKERS_LIMIT
+from api.store import CourseStore
 from utils.styles import load_css, card
 from utils.time_handler import get_user_timezone, convert_to_local
 from utils.downloader import DriveDownloader
+from utils.teacher_cache import PhotoCache
+from utils.download_manifest import DownloadManifest
 from utils.theme_manager import ThemeManager
 from utils.bookmark_manager import BookmarkManager
 
@@ -30,19 +33,23 @@ load_css(st.session_state.current_theme)
 def main():
     st.title("🎓 EasyClassroom")
     
-    def fetch_course_data(_client):
-        """Fetches all course data and works. Cached for 1 hour."""
-        courses = _client.get_courses()
+    def fetch_course_data(store, fetch_mode="Batch", max_workers=DEFAULT_MAX_WORKERS):
+        """Fetches all course data and works through the local course store."""
+        courses = store.get_courses()
         if not courses:
             return []
         
+        # Uncached courses are fetched together: batch requests or a bounded worker pool
+        all_works = store.get_all_course_work(
+            [c['id'] for c in courses], fetch_mode=fetch_mode, max_workers=max_workers, profile='dashboard'
+        )
+        
         data = []
-        for course in courses:
-            works = _client.get_course_work(course['id'])
+        for course, works in zip(courses, all_works):
             data.append({
                 'id': course['id'],
                 'name': course['name'],
-                'works': works
+                'works': works or []
             })
         return data
 
@@ -57,6 +64,9 @@ def main():
     
     # If authenticate returns, we are logged in
     client = ClassroomClient(creds)
+    store = CourseStore(client)
+    downloader = DriveDownloader(client.drive_service, creds=creds)
+    photo_cache = PhotoCache()
 
     # Sidebar Profile & Settings
     with st.sidebar:
@@ -73,13 +83,10 @@ def main():
                 # Display avatar if available, else generic
                 photo_url = profile.get('photoUrl', '')
                 if photo_url and 'https' in photo_url:
-                    # Remove size params if present to get better quality
-                    if '/s' in photo_url:
-                        photo_url = photo_url.split('/s')[0] + '/s100-c' # Request 100px cropped
-                    
+                    # 100px cropped thumbnail, cached locally
                     st.markdown(f"""
                         <div style="display: flex; justify-content: center;">
-                            <img src="{photo_url}" style="border-radius: 50%; width: 60px; height: 60px; object-fit: cover; border: 2px solid {accent_color};">
+                            <img src="{photo_cache.get_photo(photo_url)}" style="border-radius: 50%; width: 60px; height: 60px; object-fit: cover; border: 2px solid {accent_color};">
                         </div>
                     """, unsafe_allow_html=True)
                 else:
@@ -92,7 +99,10 @@ def main():
         
         st.header("⚙️ Settings")
         if st.button("🔄 Refresh Data", use_container_width=True):
-            fetch_course_data.clear()
+            store.invalidate()
+            st.rerun()
+        if st.button("🚪 Log Out", use_container_width=True):
+            logout()
             st.rerun()
 
         detected_tz = get_user_timezone()
@@ -103,6 +113,23 @@ def main():
             default_ix = all_timezones.index('UTC')
         selected_tz = st.selectbox("🌍 Timezone", all_timezones, index=default_ix)
         
+        fetch_mode = st.radio(
+            "⚡ Course Loading",
+            ["Batch", "Parallel"],
+            horizontal=True,
+            key="fetch_mode",
+            help="Batch packs all courses into a few combined requests. Parallel loads courses side by side."
+        )
+        max_workers = st.slider(
+            "Parallel Course Fetches",
+            min_value=1,
+            max_value=MAX_WORKERS_LIMIT,
+            value=DEFAULT_MAX_WORKERS,
+            key="max_workers",
+            disabled=fetch_mode != "Parallel",
+            help="How many courses to load at once. Lower this if you hit Classroom API rate limits."
+        )
+        
         st.divider()
         
         # Theme Toggle
@@ -131,7 +158,7 @@ def main():
             sort_option = st.selectbox("Sort by:", ["Urgency (Next Deadline)", "Workload (Pending Tasks)", "Alphabetical (A-Z)"])
 
         # Fetch Data (Cached)
-        raw_course_data = fetch_course_data(client)
+        raw_course_data = fetch_course_data(store, fetch_mode, max_workers)
         
         if not raw_course_data:
             st.warning("No active courses found.")
@@ -208,7 +235,7 @@ def main():
         st.header(f"📌 {selected_course_name}")
 
         with st.spinner("Fetching assignments..."):
-            works = client.get_course_work(selected_course_id)
+            works = store.get_course_work(selected_course_id)
 
         if not works:
             st.info("No content found! 🎉")
@@ -253,21 +280,26 @@ def main():
                         if not works:
                             st.warning("No files to sync.")
                         else:
-                            with st.spinner("Downloading everything..."):
-                                count = 0
+                            with st.spinner("Syncing files..."):
+                                files_to_sync = []
                                 for work in works:
                                     for mat in work.get('materials', []):
                                         if 'driveFile' in mat:
                                             dfile = mat['driveFile']['driveFile']
                                             safe_title = "".join([c for c in work['title'] if c.isalpha() or c.isdigit() or c==' ']).rstrip()
-                                            success, _ = downloader.download_file(
-                                                dfile['id'], dfile['title'], dfile.get('mimeType', ''),
-                                                f"Downloads/{selected_course_name}/{safe_title}",
-                                                assignment=work,
-                                                course_name=selected_course_name
-                                            )
-                                            if success: count += 1
-                                st.success(f"Synced {count} files!")
+                                            files_to_sync.append({
+                                                'file_id': dfile['id'],
+                                                'file_name': dfile['title'],
+                                                'mime_type': dfile.get('mimeType', ''),
+                                                'destination_folder': f"Downloads/{selected_course_name}/{safe_title}",
+                                                'assignment': work,
+                                                'course_name': selected_course_name
+                                            })
+                                # Only new or changed files are downloaded again
+                                summary = downloader.sync_files(files_to_sync, selected_course_name)
+                                st.success(f"Synced {summary['downloaded']} files! ({summary['skipped']} already up to date)")
+                                if summary['failed']:
+                                    st.warning(f"{len(summary['failed'])} file(s) failed: " + ", ".join(name for name, _ in summary['failed']))
 
                 with qa_col2:
                     if st.button("📧 Email Teachers", use_container_width=True):
@@ -337,6 +369,9 @@ def main():
                 if not works:
                      st.info("No content found! 🎉")
                 
+                # Where each attachment was saved (see Sync All Files / ⬇️ DL)
+                manifest = DownloadManifest(selected_course_name)
+                
                 for idx, work in enumerate(display_works):
                         # Convert to Local Time
                         local_deadline = None
@@ -436,10 +471,10 @@ def main():
                                     if 'driveFile' in mat:
                                         dfile = mat['driveFile']['driveFile']
                                         
-                                        # Check if file exists locally
+                                        # Check if file exists locally (completed downloads only; partial ones are .part files)
                                         import os
                                         safe_title = "".join([c for c in work['title'] if c.isalpha() or c.isdigit() or c==' ']).rstrip()
-                                        file_path = f"Downloads/{selected_course_name}/{safe_title}/{dfile['title']}"
+                                        file_path = manifest.get_path(dfile['id']) or f"Downloads/{selected_course_name}/{safe_title}/{dfile['title']}"
                                         is_downloaded = os.path.exists(file_path)
 
                                         c1, c2, c3 = st.columns([0.6, 0.2, 0.2])
@@ -463,6 +498,8 @@ def main():
                                                             course_name=selected_course_name
                                                         )
                                                         if success:
+                                                            manifest.record(dfile['id'], None, path)
+                                                            manifest.save()
                                                             st.toast(f"Saved to {path}", icon="✅")
                                                             st.rerun()
                                                         else:
@@ -482,6 +519,9 @@ def main():
                                                             assignment=work,
                                                             course_name=selected_course_name
                                                         )
+                                                        if success:
+                                                            manifest.record(dfile['id'], None, path)
+                                                            manifest.save()
                                                     else:
                                                         success = True
                                                         path = file_path
@@ -535,11 +575,7 @@ def main():
                         t_col1, t_col2 = st.columns([0.15, 0.85])
                         with t_col1:
                             if photo_url:
-                                if not photo_url.startswith('http'):
-                                    photo_url = f"https:{photo_url}"
-                                if '/s' in photo_url:
-                                    photo_url = photo_url.split('/s')[0] + '/s100-c'
-                                st.markdown(f'<img src="{photo_url}" style="border-radius: 50%; width: 50px; height: 50px; object-fit: cover;">', unsafe_allow_html=True)
+                                st.markdown(f'<img src="{photo_cache.get_photo(photo_url)}" style="border-radius: 50%; width: 50px; height: 50px; object-fit: cover;">', unsafe_allow_html=True)
                             else:
                                 st.markdown('<div style="font-size: 30px; text-align: center;">👤</div>', unsafe_allow_html=True)
                         
@@ -580,11 +616,14 @@ def main():
             if not works:
                 st.info("No data to analyze yet!")
             else:
+                # Classify every title in one vectorized pass (columnar, no per-item dicts)
+                parsed = client.parser.parse_batch(
+                    [w['title'] for w in works],
+                    [w.get('description') for w in works]
+                )
+                
                 # Assignment Types Distribution
-                type_counts = {}
-                for w in works:
-                    t = w['type']
-                    type_counts[t] = type_counts.get(t, 0) + 1
+                type_counts = pd.Series([w['type'] for w in works]).value_counts(sort=False)
                 
                 st.markdown("### 📋 Assignment Types")
                 for atype, count in type_counts.items():
@@ -592,6 +631,17 @@ def main():
                 
                 st.divider()
                 
+                # Topic Coverage
+                topic_counts = parsed.dropna(subset=['topic']).groupby('topic')['category'].agg(['count', 'unique'])
+                if not topic_counts.empty:
+                    st.markdown("### 🧭 Topics")
+                    topic_counts = topic_counts.sort_values('count', ascending=False)
+                    topic_counts['unique'] = topic_counts['unique'].map(', '.join)
+                    topic_counts.columns = ['Items', 'Categories']
+                    st.dataframe(topic_counts, use_container_width=True)
+                    
+                    st.divider()
+                
                 # Deadline Status
                 st.markdown("### ⏰ Deadline Status")
                 overdue = sum(1 for w in works if w['deadline'] and w['deadline'] < now_utc)
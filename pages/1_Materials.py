@@ -2,8 +2,10 @@ import streamlit as st
 import os
 from auth import authenticate
 from api.classroom import ClassroomClient
+from api.store import CourseStore
 from api.gmail import GmailClient
 from utils.downloader import DriveDownloader
+from utils.teacher_cache import PhotoCache
 from utils.styles import load_css
 
 st.set_page_config(page_title="Materials", page_icon="📚", layout="wide")
@@ -18,11 +20,12 @@ def main():
         return
 
     client = ClassroomClient(creds)
+    store = CourseStore(client)
     gmail_client = GmailClient(creds)
-    downloader = DriveDownloader(client.drive_service)
+    downloader = DriveDownloader(client.drive_service, creds=creds)
 
     # Sidebar
-    courses = client.get_courses()
+    courses = store.get_courses()
     if not courses:
         st.warning("No courses found.")
         return
@@ -44,11 +47,7 @@ def main():
             t_col1, t_col2 = st.sidebar.columns([0.25, 0.75])
             with t_col1:
                 if photo_url:
-                    if not photo_url.startswith('http'):
-                        photo_url = f"https:{photo_url}"
-                    if '/s' in photo_url:
-                        photo_url = photo_url.split('/s')[0] + '/s100-c'
-                    st.markdown(f'<img src="{photo_url}" style="border-radius: 50%; width: 40px; height: 40px; object-fit: cover;">', unsafe_allow_html=True)
+                    st.markdown(f'<img src="{PhotoCache().get_photo(photo_url)}" style="border-radius: 50%; width: 40px; height: 40px; object-fit: cover;">', unsafe_allow_html=True)
                 else:
                     st.markdown('<div style="font-size: 24px; text-align: center;">👤</div>', unsafe_allow_html=True)
             
@@ -66,9 +65,8 @@ def main():
 
     # Fetch Materials
     with st.spinner(f"Fetching materials for {selected_course_name}..."):
-        # Note: In a real app, we'd have a dedicated get_course_materials method
-        # reusing get_course_work for now as it contains materials too
-        works = client.get_course_work(selected_course['id'])
+        # get_course_work includes materials too (assignments can carry attachments)
+        works = store.get_course_work(selected_course['id'])
 
     for work in works:
         if not work['materials']:
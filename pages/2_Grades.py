@@ -1,11 +1,17 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
 from auth import authenticate
 from api.classroom import ClassroomClient
+from api.store import CourseStore
 from api.gmail import GmailClient
 from utils.styles import load_css, card
-from utils.grading_engine import load_policies, match_course_policy, categorize_assignment, calculate_weighted_grade
+from utils.teacher_cache import PhotoCache
+from utils.grading_engine import (
+    load_policies, match_course_policy, categorize_assignment, calculate_weighted_grade,
+    grade_projection, required_scores, scenario_grid
+)
 
 st.set_page_config(page_title="Grades", page_icon="📈", layout="wide")
 load_css()
@@ -19,10 +25,11 @@ def main():
         return
 
     client = ClassroomClient(creds)
+    store = CourseStore(client)
     gmail_client = GmailClient(creds)
     
     # 1. Fetch Courses First
-    courses = client.get_courses()
+    courses = store.get_courses()
     if not courses:
         st.warning("No courses found.")
         return
@@ -36,12 +43,14 @@ def main():
     matched_policy = match_course_policy(selected_course_name, policies)
     
     with st.spinner(f"Fetching grades for {selected_course_name}..."):
-        works = client.get_course_work(selected_course['id'])
+        works = store.get_course_work(selected_course['id'], profile='grades')
+        # One listing for the whole course instead of one call per assignment
+        submissions = store.get_submissions(selected_course['id'])
         course_grades = []
         
         for work in works:
             if work['max_points']:
-                sub = client.get_my_submissions(selected_course['id'], work['id'])
+                sub = submissions.get(work['id'])
                 if sub and sub.get('assigned_grade'):
                     # Categorize
                     category = "Uncategorized"
@@ -108,11 +117,7 @@ def main():
                             t_col1, t_col2 = st.columns([0.15, 0.85])
                             with t_col1:
                                 if photo_url:
-                                    if not photo_url.startswith('http'):
-                                        photo_url = f"https:{photo_url}"
-                                    if '/s' in photo_url:
-                                        photo_url = photo_url.split('/s')[0] + '/s100-c'
-                                    st.markdown(f'<img src="{photo_url}" style="border-radius: 50%; width: 40px; height: 40px; object-fit: cover;">', unsafe_allow_html=True)
+                                    st.markdown(f'<img src="{PhotoCache().get_photo(photo_url)}" style="border-radius: 50%; width: 40px; height: 40px; object-fit: cover;">', unsafe_allow_html=True)
                                 else:
                                     st.markdown('<div style="font-size: 24px; text-align: center;">👤</div>', unsafe_allow_html=True)
                             
@@ -127,5 +132,45 @@ def main():
                                     else:
                                         st.error("Failed to create draft.")
 
+    # 5. What-If Projection
+    if matched_policy:
+        st.divider()
+        st.subheader("🎯 What-If Projection")
+        
+        projection = grade_projection(df.assign(Course=selected_course['id']), {selected_course['id']: matched_policy})
+        target = st.slider("Target final grade (%)", 50, 100, 85, key="whatif_target")
+        needed = required_scores(projection, target).iloc[0]
+        
+        if pd.isna(needed):
+            st.info("Every category in the policy already has grades.")
+        elif needed > 100:
+            st.error(f"❌ {target}% is out of reach: it would need {needed:.1f}% on everything remaining.")
+        elif needed <= 0:
+            st.success(f"✅ {target}% is already secured.")
+        else:
+            st.metric("Needed on Remaining Categories", f"{needed:.1f}%", help="Average score needed on every category that has no grades yet")
+        
+        # All score combinations are computed once; the sliders only look up a row
+        remaining = [category for category in matched_policy['policy'] if category not in set(df['Category'])]
+        if remaining:
+            step = 5 if len(remaining) <= 3 else 10 if len(remaining) <= 5 else 25
+            grid, finals = scenario_grid(course_grades, matched_policy, step=step)
+            remaining = list(grid.columns)
+            
+            st.caption("Try scores for the remaining categories:")
+            slider_cols = st.columns(len(remaining))
+            picks = []
+            for col, category in zip(slider_cols, remaining):
+                with col:
+                    picks.append(st.slider(category, 0, 100, 80 // step * step, step=step, key=f"whatif_{category}"))
+            
+            levels = len(range(0, 101, step))
+            final = finals.iloc[np.ravel_multi_index(tuple(p // step for p in picks), (levels,) * len(remaining))]
+            reach = (finals >= target).mean() * 100
+            
+            c1, c2 = st.columns(2)
+            c1.metric("Final Grade with These Scores", f"{final:.1f}%", delta=f"{final - target:+.1f} vs target")
+            c2.metric("Scenarios Reaching Target", f"{reach:.0f}%", help=f"Share of all {len(grid):,} score combinations (steps of {step}%)")
+
 if __name__ == "__main__":
     main()
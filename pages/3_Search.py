@@ -1,6 +1,7 @@
 import streamlit as st
 from auth import authenticate
 from api.classroom import ClassroomClient
+from api.store import CourseStore
 from utils.styles import load_css, card
 
 st.set_page_config(page_title="Search", page_icon="🔍", layout="wide")
@@ -15,16 +16,17 @@ def main():
         return
 
     client = ClassroomClient(creds)
+    store = CourseStore(client)
     
     query = st.text_input("Search for assignments, quizzes, or materials...", placeholder="e.g., 'Calculus Midterm' or 'Physics PDF'")
     
     if query:
         with st.spinner("Searching across all courses..."):
-            courses = client.get_courses()
+            courses = store.get_courses()
             results = []
             
             for course in courses:
-                works = client.get_course_work(course['id'])
+                works = store.get_course_work(course['id'], profile='search')
                 for work in works:
                     # Search in Title and Description
                     if query.lower() in work['title'].lower() or \
@@ -4,6 +4,7 @@ import calendar as cal
 import pytz
 from auth import authenticate
 from api.classroom import ClassroomClient
+from api.store import CourseStore
 from api.calendar_api import CalendarClient
 from utils.styles import load_css
 
@@ -55,6 +56,7 @@ def main():
     
     # Initialize APIs
     classroom_client = ClassroomClient(creds)
+    store = CourseStore(classroom_client)
     calendar_client = CalendarClient(creds)
     
     # Tabs
@@ -261,56 +263,27 @@ def main():
             if st.button(f"🚀 Sync All Upcoming ({days_ahead} Days)", use_container_width=True):
                 with st.spinner(f"Syncing all courses for next {days_ahead} days..."):
                     # Fetch courses only when button clicked!
-                    courses = classroom_client.get_courses()
-                    now = datetime.now(pytz.utc)
-                    target_date = now + timedelta(days=days_ahead)
-                    total_synced = 0
-                    skipped = 0
+                    courses = store.get_courses()
+                    target_date = datetime.now(pytz.utc) + timedelta(days=days_ahead)
+                    all_works = store.get_all_course_work([c['id'] for c in courses])
                     
-                    # Get existing events to avoid duplicates
-                    existing_events = calendar_client.get_upcoming_events(max_results=200)
-                    existing_titles = {e.get('summary', '') for e in existing_events}
+                    # Events are matched to assignments by courseId / courseWorkId, so re-syncs only touch changes
+                    result = calendar_client.sync_courses(list(zip(courses, all_works)), time_max=target_date)
                     
-                    for course in courses:
-                        works = classroom_client.get_course_work(course['id'])
-                        # Filter: Only upcoming assignments in specified days
-                        upcoming_works = [
-                            w for w in works 
-                            if w.get('deadline') and now < w['deadline'] <= target_date
-                        ]
-                        
-                        for work in upcoming_works:
-                            summary = f"[{work.get('type', 'ASSIGNMENT')}] {work['title']}"
-                            
-                            # Check for duplicates
-                            if summary in existing_titles:
-                                skipped += 1
-                                continue
-                            
-                            description = work.get('description', 'No description')
-                            start_time = work['deadline'] - timedelta(hours=6)  # 6 hours before
-                            end_time = work['deadline']
-                            
-                            event_id, link = calendar_client.create_event(
-                                work['title'],
-                                description,
-                                start_time,
-                                end_time,
-                                course['name'],
-                                work.get('type', 'ASSIGNMENT')
-                            )
-                            
-                            if event_id:
-                                total_synced += 1
-                                existing_titles.add(summary)  # Add to prevent duplicates in same sync
-                    
-                    if total_synced > 0:
-                        st.success(f"✅ Synced {total_synced} new assignments!")
-                        if skipped > 0:
-                            st.info(f"⏭️ Skipped {skipped} duplicates")
+                    if result['created'] or result['updated'] or result['deleted']:
+                        st.success(
+                            f"✅ Synced! {result['created']} new, {result['updated']} updated, "
+                            f"{result['deleted']} removed."
+                        )
+                        if result['unchanged']:
+                            st.info(f"⏭️ {result['unchanged']} already up to date")
                         st.balloons()
                     else:
-                        st.info(f"No new assignments to sync. {skipped} already exist in your calendar.")
+                        st.info(f"No new assignments to sync. {result['unchanged']} already exist in your calendar.")
+                    if result['failed']:
+                        st.warning(f"{result['failed']} calendar change(s) failed. Try syncing again.")
+                    if result['unavailable']:
+                        st.warning(f"⚠️ {result['unavailable']} course(s) couldn't be loaded; their events were left as they are.")
         
         with col2:
             if st.button("🗑️ Clean Up Past Events", use_container_width=True):
@@ -325,7 +298,7 @@ def main():
     with tab_add:
         st.subheader("➕ Add Custom Event")
         
-        courses = classroom_client.get_courses()
+        courses = store.get_courses()
         course_names = [c['name'] for c in courses]
         
         col1, col2 = st.columns(2)
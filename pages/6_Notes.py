@@ -2,6 +2,7 @@ import streamlit as st
 import os
 from auth import authenticate
 from api.classroom import ClassroomClient
+from api.store import CourseStore
 from utils.styles import load_css, card
 
 st.set_page_config(page_title="Notes", page_icon="📝", layout="wide")
@@ -16,7 +17,8 @@ def main():
         return
 
     client = ClassroomClient(creds)
-    courses = client.get_courses()
+    store = CourseStore(client)
+    courses = store.get_courses()
     
     if not courses:
         st.warning("No courses found.")
@@ -5,6 +5,7 @@ import json
 import os
 from auth import authenticate
 from api.classroom import ClassroomClient
+from api.store import CourseStore
 from utils.whatsapp_notifier import WhatsAppNotifier
 from utils.styles import load_css
 
@@ -45,6 +46,7 @@ def main():
     
     # Initialize API
     classroom_client = ClassroomClient(creds)
+    store = CourseStore(classroom_client)
     
     # Load settings
     settings = load_settings()
@@ -185,7 +187,7 @@ def main():
         else:
             action = st.radio(
                 "Choose action:",
-                ["📚 Send Daily Summary", "🚨 Send Alert for New Assignments"]
+                ["📚 Send Daily Summary", "🚨 Send Alert for New Assignments", "🆕 Send Alert for Items Added Since Last Sync"]
             )
             
             if st.button("📨 Send Now", use_container_width=True):
@@ -194,11 +196,11 @@ def main():
                     
                     if "Daily Summary" in action:
                         # Get all assignments from all courses
-                        courses = classroom_client.get_courses()
+                        courses = store.get_courses()
                         all_assignments = []
                         
                         for course in courses:
-                            works = classroom_client.get_course_work(course['id'])
+                            works = store.get_course_work(course['id'])
                             for work in works:
                                 work['course_name'] = course['name']
                                 all_assignments.append(work)
@@ -213,14 +215,39 @@ def main():
                         else:
                             st.error(f"❌ {result}")
                     
+                    elif "Since Last Sync" in action:
+                        # Incremental sync reports exactly what was added since the previous sync
+                        courses = store.get_courses()
+                        new_items = []
+                        
+                        for course in courses:
+                            works = store.sync_course_work(course['id'])
+                            added_ids = set(store.pop_changes(course['id'])['added'])
+                            for work in works:
+                                if work['id'] in added_ids:
+                                    work['course_name'] = course['name']
+                                    new_items.append(work)
+                        
+                        if not new_items:
+                            st.info("Nothing new since the last sync!")
+                        else:
+                            sent_count = 0
+                            for assignment in new_items:
+                                message = notifier.format_new_assignment_alert(assignment)
+                                success, result = notifier.send_message(message)
+                                if success:
+                                    sent_count += 1
+                            
+                            st.success(f"✅ Sent {sent_count} alerts!")
+                    
                     else:
                         # Get recent assignments (last 3 days)
-                        courses = classroom_client.get_courses()
+                        courses = store.get_courses()
                         recent_assignments = []
                         now = datetime.now(pytz.utc)
                         
                         for course in courses:
-                            works = classroom_client.get_course_work(course['id'])
+                            works = store.get_course_work(course['id'])
                             for work in works:
                                 # Check if created in last 3 days
                                 if work.get('creationTime'):
@@ -0,0 +1,101 @@
+import time
+import streamlit as st
+import numpy as np
+import pandas as pd
+import plotly.express as px
+from auth import authenticate
+from api.classroom import ClassroomClient
+from api.store import CourseStore
+from api.grade_table import GradeTable
+from utils.styles import load_css
+from utils.grading_engine import load_policies, match_course_policy, course_grades, grade_points
+
+st.set_page_config(page_title="Semester", page_icon="🎓", layout="wide")
+load_css()
+
+def main():
+    st.title("🎓 Semester Overview")
+
+    creds = authenticate()
+    if not creds:
+        st.error("Please log in first.")
+        return
+
+    client = ClassroomClient(creds)
+    store = CourseStore(client)
+    table = GradeTable(store)
+
+    courses = store.get_courses()
+    if not courses:
+        st.warning("No courses found.")
+        return
+
+    # 1. Bring the grade table up to date (only changed submissions are rewritten)
+    course_ids = [c['id'] for c in courses]
+    last_synced = table.last_synced(course_ids)
+    if st.button("🔄 Sync Grades") or last_synced is None or time.time() - last_synced > store.ttls['submissions']:
+        with st.spinner("Syncing grades across all courses..."):
+            table.refresh(courses)
+        last_synced = table.last_synced(course_ids)
+    if last_synced:
+        st.caption(f"Grades synced {time.strftime('%b %d, %H:%M', time.localtime(last_synced))}")
+
+    # 2. Everything below renders from the local table
+    df = table.frame(course_ids)
+    graded = df.dropna(subset=['Percentage'])
+    if graded.empty:
+        st.info("No graded assignments yet this semester.")
+        return
+
+    policies = load_policies()
+    course_policies = {c['name']: match_course_policy(c['name'], policies) for c in courses}
+    grades = course_grades(graded, course_policies).dropna()
+    summary = pd.DataFrame({
+        'Course': grades.index,
+        'Grade': grades.to_numpy(),
+        'Points': grade_points(grades.to_numpy()),
+        'Graded': graded.groupby('Course').size().reindex(grades.index).to_numpy(),
+        'Policy': ['Weighted' if course_policies[course] else 'Average' for course in grades.index]
+    })
+
+    awaiting = ((df['State'] == 'TURNED_IN') & df['Percentage'].isna()).sum()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Semester GPA", f"{np.mean(summary['Points']):.2f}", help="Unweighted mean of course grade points (4.0 scale)")
+    c2.metric("Average Grade", f"{summary['Grade'].mean():.1f}%")
+    c3.metric("Graded Assignments", len(graded))
+    c4.metric("Awaiting Grades", int(awaiting), help="Turned in but not graded yet")
+
+    # 3. Charts
+    col1, col2 = st.columns(2)
+
+    with col1:
+        fig = px.bar(
+            summary.sort_values('Grade'), x='Grade', y='Course', orientation='h', color='Points',
+            range_x=[0, 100], range_color=[0, 4], title="Current Grade by Course",
+            hover_data=['Graded', 'Policy']
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    with col2:
+        # Running average per category, across all courses, in due-date order
+        trend = graded.dropna(subset=['Due']).sort_values('Due')
+        by_category = trend.groupby('Category')['Percentage']
+        trend = trend.assign(Average=by_category.cumsum() / (by_category.cumcount() + 1))
+        fig = px.line(
+            trend, x='Due', y='Average', color='Category', markers=True,
+            hover_data=['Course', 'Assignment', 'Percentage'], title="Category Trends"
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    fig = px.box(graded, x='Category', y='Percentage', color='Category', points='all',
+                 hover_data=['Course', 'Assignment'], title="Score Spread by Category")
+    st.plotly_chart(fig, use_container_width=True)
+
+    with st.expander("📋 All Grades"):
+        st.dataframe(
+            graded[['Course', 'Assignment', 'Category', 'Grade', 'Max', 'Percentage', 'State', 'Due']],
+            use_container_width=True, hide_index=True
+        )
+
+if __name__ == "__main__":
+    main()
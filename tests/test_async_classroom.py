@@ -0,0 +1,130 @@
+import asyncio
+import random
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from api.async_classroom import AsyncClassroomClient
+from api.classroom import ClassroomClient
+from utils.parser import AcademicParser
+
+PAGE_SIZE = 2
+
+
+class FakeCreds:
+    valid = True
+
+    def apply(self, headers):
+        headers['authorization'] = 'Bearer test'
+
+
+def course_work(course_id):
+    return [
+        {'id': f'{course_id}-w{i}', 'title': f'Quiz {i}', 'workType': 'ASSIGNMENT', 'maxPoints': 10,
+         'dueDate': {'year': 2030, 'month': 1, 'day': i + 1}, 'dueTime': {'hours': 12},
+         'updateTime': f'2030-01-0{i + 1}T00:00:00Z'}
+        for i in range(5)
+    ]
+
+
+def materials(course_id):
+    return [{'id': f'{course_id}-m0', 'title': 'Lecture 1 Slides', 'updateTime': '2030-01-01T00:00:00Z'}]
+
+
+class FakeClassroom:
+    """Classroom API stand-in: paginates courseWork, rate limits the first call once, tracks concurrency."""
+
+    def __init__(self, rate_limit_first=False):
+        self.rate_limit_first = rate_limit_first
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _track(self):
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+
+    async def course_work(self, request):
+        await self._track()
+        if self.rate_limit_first:
+            self.rate_limit_first = False
+            return web.json_response({'error': {'code': 429}}, status=429)
+        items = course_work(request.match_info['course_id'])
+        start = int(request.query.get('pageToken', 0))
+        page = {'courseWork': items[start:start + PAGE_SIZE]}
+        if start + PAGE_SIZE < len(items):
+            page['nextPageToken'] = str(start + PAGE_SIZE)
+        return web.json_response(page)
+
+    async def materials(self, request):
+        await self._track()
+        return web.json_response({'courseWorkMaterial': materials(request.match_info['course_id'])})
+
+    async def user_profile(self, request):
+        await self._track()
+        user_id = request.match_info['user_id']
+        if user_id == 'busy':
+            return web.json_response({'error': {'code': 429}}, status=429)
+        return web.json_response({'id': user_id, 'photoUrl': f'https://photos.example/{user_id}'})
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get('/v1/userProfiles/{user_id}', self.user_profile)
+        app.router.add_get('/v1/courses/{course_id}/courseWork', self.course_work)
+        app.router.add_get('/v1/courses/{course_id}/courseWorkMaterials', self.materials)
+        return app
+
+
+async def fetch(fake, call, max_concurrency=4):
+    async with TestServer(fake.app()) as server:
+        base_url = str(server.make_url('/v1'))
+        async with AsyncClassroomClient(FakeCreds(), base_url=base_url, max_concurrency=max_concurrency) as client:
+            return await call(client)
+
+
+def expected_works(course_id):
+    sync_client = ClassroomClient.__new__(ClassroomClient)
+    sync_client.parser = AcademicParser()
+    return sync_client._process_items(course_work(course_id) + materials(course_id))
+
+
+def test_follows_next_page_token_and_matches_sync_processing():
+    fake = FakeClassroom()
+    works = asyncio.run(fetch(fake, lambda client: client.get_course_work('c1')))
+
+    assert works == expected_works('c1')
+    assert len([w for w in works if w['workType'] != 'MATERIAL']) == 5
+    # 3 courseWork pages + 1 materials page
+    assert fake.requests == 4
+
+
+def test_retries_rate_limited_request(monkeypatch):
+    monkeypatch.setattr(random, 'random', lambda: 0)
+    fake = FakeClassroom(rate_limit_first=True)
+    works = asyncio.run(fetch(fake, lambda client: client.get_course_work('c1', include_materials=False)))
+
+    assert [w['id'] for w in works] == [w['id'] for w in expected_works('c1') if w['workType'] != 'MATERIAL']
+    assert fake.requests == 4
+
+
+def test_max_concurrency_caps_requests_in_flight():
+    fake = FakeClassroom()
+    course_ids = [f'c{i}' for i in range(6)]
+    results = asyncio.run(fetch(fake, lambda client: client.get_all_course_work(course_ids), max_concurrency=2))
+
+    assert results == [expected_works(course_id) for course_id in course_ids]
+    assert fake.max_in_flight == 2
+
+
+def test_teacher_photos_report_rate_limited_lookups(monkeypatch):
+    monkeypatch.setattr(random, 'random', lambda: 0)
+    teachers = [
+        {'userId': 't1', 'profile': {'name': {'fullName': 'A'}}},
+        {'userId': 'busy', 'profile': {'name': {'fullName': 'B'}}},
+    ]
+    complete = asyncio.run(fetch(FakeClassroom(), lambda client: client._fill_teacher_photos(teachers)))
+
+    assert complete is False
+    assert teachers[0]['profile']['photoUrl'] == 'https://photos.example/t1'
+    assert 'photoUrl' not in teachers[1]['profile']
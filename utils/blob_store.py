@@ -0,0 +1,66 @@
+import os
+import shutil
+
+BLOB_STORE_PATH = os.path.join("Downloads", ".blobs")
+
+class BlobStore:
+    """Content-addressable store for downloaded Drive files.
+
+    Each unique file is stored once, keyed by its md5Checksum (or by Drive file ID
+    when Drive reports no checksum, e.g. exported Google Docs). The organized
+    per-course paths are hard links into the store, or symlinks / copies where
+    the file system can't hard-link.
+    """
+
+    def __init__(self, base_path=BLOB_STORE_PATH):
+        self.base_path = base_path
+
+    def path_for(self, file_id, md5_checksum=None, extension='', version=None):
+        """Blob path for a file: by content when the checksum is known, by file ID and
+        version for exports, else by file ID alone."""
+        if md5_checksum:
+            return os.path.join(self.base_path, 'md5', md5_checksum)
+        if version:
+            return os.path.join(self.base_path, 'export', file_id, version + extension)
+        return os.path.join(self.base_path, 'id', file_id + extension)
+
+    @staticmethod
+    def drop_other_versions(blob_path):
+        """Removes older exports of the same file and format.
+
+        Organized files linked to them keep their content only because exports are
+        never symlinked (see link(allow_symlink=False)).
+        """
+        folder = os.path.dirname(blob_path)
+        extension = os.path.splitext(blob_path)[1]
+        for name in os.listdir(folder):
+            path = os.path.join(folder, name)
+            if path != blob_path and name.endswith(extension):
+                os.remove(path)
+
+    @staticmethod
+    def link(blob_path, target_path, allow_symlink=True):
+        """Makes target_path point at blob_path (hard link, else symlink, else copy).
+
+        Pass allow_symlink=False for blobs that may later be removed (exports), so the
+        fallback is a copy rather than a link that would dangle.
+        """
+        if os.path.lexists(target_path):
+            if os.path.exists(target_path) and os.path.samefile(blob_path, target_path):
+                return target_path
+            os.remove(target_path)
+
+        target_dir = os.path.dirname(target_path)
+        if target_dir:
+            os.makedirs(target_dir, exist_ok=True)
+
+        try:
+            os.link(blob_path, target_path)
+        except OSError:
+            try:
+                if not allow_symlink:
+                    raise OSError("symlinks not allowed for this blob")
+                os.symlink(os.path.abspath(blob_path), target_path)
+            except OSError:
+                shutil.copy2(blob_path, target_path)
+        return target_path
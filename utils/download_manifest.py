@@ -0,0 +1,76 @@
+import os
+import json
+from datetime import datetime
+
+# Drive metadata fields that tell whether a file changed since it was downloaded
+TRACKED_FIELDS = ['md5Checksum', 'modifiedTime', 'size', 'version']
+
+class DownloadManifest:
+    """Per-course record of downloaded Drive files, used to skip unchanged files on re-sync."""
+
+    def __init__(self, course_name, base_path="Downloads"):
+        safe_name = "".join([c for c in course_name if c.isalpha() or c.isdigit() or c==' ']).rstrip()
+        self.manifest_path = os.path.join(base_path, safe_name, ".manifest.json")
+        self._load()
+
+    def _load(self):
+        """Load manifest from file"""
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    self.files = json.load(f).get('files', {})
+            except Exception as e:
+                print(f"Error reading manifest: {e}")
+                self.files = {}
+        else:
+            self.files = {}
+
+    def save(self):
+        """Save manifest to file (atomically, so a crash never leaves half a manifest)"""
+        try:
+            os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+            tmp_path = self.manifest_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'files': self.files}, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.manifest_path)
+            return True
+        except Exception as e:
+            print(f"Error saving manifest: {e}")
+            return False
+
+    def get(self, file_id):
+        """Manifest entry for a Drive file, or None"""
+        return self.files.get(file_id)
+
+    def get_path(self, file_id):
+        """Local path of a file that was downloaded and still exists, else None"""
+        entry = self.files.get(file_id)
+        if entry and os.path.exists(entry['path']):
+            return entry['path']
+        return None
+
+    def is_unchanged(self, file_id, metadata):
+        """True if the local copy matches the given Drive metadata and is still on disk"""
+        entry = self.files.get(file_id)
+        if not entry or not metadata or not os.path.exists(entry['path']):
+            return False
+
+        # Compare whatever Drive reports (Google Docs have no md5Checksum or size)
+        compared = [f for f in TRACKED_FIELDS if metadata.get(f) is not None]
+        if not compared or any(entry.get(f) != metadata[f] for f in compared):
+            return False
+
+        # Binary files: the file on disk must be complete (exported Google Docs differ in size)
+        is_google_doc = 'application/vnd.google-apps' in metadata.get('mimeType', '')
+        if metadata.get('size') is not None and not is_google_doc:
+            return os.path.getsize(entry['path']) == int(metadata['size'])
+        return True
+
+    def record(self, file_id, metadata, local_path):
+        """Remember a completed download (call save() afterwards)"""
+        entry = {f: (metadata or {}).get(f) for f in TRACKED_FIELDS}
+        entry.update({
+            'path': local_path,
+            'downloaded_at': datetime.now().isoformat()
+        })
+        self.files[file_id] = entry
@@ -1,26 +1,111 @@
 import io
 import os
+import hashlib
 import subprocess
 import platform
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import httplib2
 from googleapiclient.http import MediaIoBaseDownload
 from googleapiclient.errors import HttpError
 from utils.organization_rules import OrganizationRules
+from utils.download_manifest import DownloadManifest
+from utils.blob_store import BlobStore
+from api.services import authorized_http
+
+# Parallel downloads in batch_download
+DEFAULT_DOWNLOAD_WORKERS = 4
+
+# Bytes requested per Range request; smaller chunks lose less progress on flaky connections
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+# Retries (with exponential backoff) for each chunk
+CHUNK_RETRIES = 3
+# Unfinished downloads are kept next to the target with this suffix and resumed later
+PART_SUFFIX = '.part'
+
+# Default export format (file extension) per Google Docs type
+EXPORT_FORMATS = {
+    'document': 'pdf',
+    'spreadsheet': 'xlsx',
+    'presentation': 'pdf',
+}
+
+# Export formats that can be requested per file (export_format='docx', ...)
+EXPORT_MIME_TYPES = {
+    'pdf': 'application/pdf',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    'odt': 'application/vnd.oasis.opendocument.text',
+    'csv': 'text/csv',
+    'txt': 'text/plain',
+}
+
+# Drive accepts up to 100 calls per batch request
+METADATA_BATCH_SIZE = 100
+METADATA_FIELDS = 'id,name,mimeType,md5Checksum,modifiedTime,size,version'
+
+# One writer per blob, even when two file IDs share the same content
+_blob_locks = {}
+_blob_locks_lock = threading.Lock()
+
+def _blob_lock(blob_path):
+    with _blob_locks_lock:
+        return _blob_locks.setdefault(blob_path, threading.Lock())
+
+def export_version(metadata):
+    """Cache key for an export: the Drive version, else modifiedTime (None if neither is known)."""
+    if not metadata:
+        return None
+    if metadata.get('version'):
+        return str(metadata['version'])
+    if metadata.get('modifiedTime'):
+        return metadata['modifiedTime'].replace(':', '-')
+    return None
 
 class DriveDownloader:
-    def __init__(self, drive_service, use_smart_organization=True):
+    def __init__(self, drive_service, use_smart_organization=True, max_workers=DEFAULT_DOWNLOAD_WORKERS,
+                 chunk_size=DEFAULT_CHUNK_SIZE, blob_store=None, export_formats=None, creds=None):
         self.service = drive_service
+        # Requests run on this session's credentials, not those the shared service was built with
+        self.creds = creds or drive_service._http.credentials
         self.use_smart_organization = use_smart_organization
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.blobs = blob_store or BlobStore()
+        self.export_formats = dict(EXPORT_FORMATS, **(export_formats or {}))
 
-    def download_file(self, file_id, file_name, mime_type, destination_folder, assignment=None, course_name=None):
-        """Downloads a file from Drive to the local file system.
+    def _http(self):
+        """Authorized HTTP transport for the calling thread (httplib2 is not thread-safe)."""
+        return authorized_http(self.creds)
+
+    def _fetch_media(self, request, part_path, resume):
+        """Streams a media request into part_path, continuing from its current size if resume is set."""
+        offset = os.path.getsize(part_path) if resume and os.path.exists(part_path) else 0
+        with io.FileIO(part_path, 'ab' if offset else 'wb') as fh:
+            downloader = MediaIoBaseDownload(fh, request, chunksize=self.chunk_size)
+            # MediaIoBaseDownload builds its Range header from _progress
+            downloader._progress = offset
+            done = False
+            while done is False:
+                status, done = downloader.next_chunk(num_retries=CHUNK_RETRIES)
+        return offset
+
+    @staticmethod
+    def _md5(file_path):
+        digest = hashlib.md5()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _resolve_target(self, file_name, mime_type, destination_folder, assignment=None, course_name=None,
+                        export_format=None):
+        """Local path for a Drive file and, for Google Docs, the export MIME type.
         
-        Args:
-            file_id: Drive file ID
-            file_name: Name of the file
-            mime_type: MIME type of the file
-            destination_folder: Base destination folder
-            assignment: Assignment metadata (for smart organization)
-            course_name: Course name (for smart organization)
+        Returns:
+            (file_path, export_mime_type); export_mime_type is None for binary files.
+            file_path is None for Google Docs types that can't be exported.
         """
         # Use smart organization if enabled and metadata is available
         if self.use_smart_organization and assignment and course_name:
@@ -30,72 +115,282 @@ class DriveDownloader:
             safe_title = "".join([c for c in assignment_title if c.isalpha() or c.isdigit() or c in ' -_']).strip()
             destination_folder = os.path.join(destination_folder, organized_path, safe_title)
         
-        if not os.path.exists(destination_folder):
-            os.makedirs(destination_folder)
-
-        file_path = os.path.join(destination_folder, file_name)
-        
         # Handle Google Docs/Sheets/Slides (Export links)
         if 'application/vnd.google-apps' in mime_type:
-            if 'document' in mime_type:
-                mime_type = 'application/pdf'
-                file_name += '.pdf'
-                file_path = os.path.join(destination_folder, file_name)
-            elif 'spreadsheet' in mime_type:
-                mime_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-                file_name += '.xlsx'
-                file_path = os.path.join(destination_folder, file_name)
-            elif 'presentation' in mime_type:
-                mime_type = 'application/pdf'
-                file_name += '.pdf'
-                file_path = os.path.join(destination_folder, file_name)
-            else:
-                return False, "Unsupported Google Doc type"
-            
-            request = self.service.files().export_media(fileId=file_id, mimeType=mime_type)
+            if not export_format:
+                export_format = next((fmt for doc_type, fmt in self.export_formats.items() if doc_type in mime_type), None)
+            if export_format not in EXPORT_MIME_TYPES:
+                return None, None
+            return os.path.join(destination_folder, f"{file_name}.{export_format}"), EXPORT_MIME_TYPES[export_format]
+        
+        return os.path.join(destination_folder, file_name), None
+
+    def download_file(self, file_id, file_name, mime_type, destination_folder, assignment=None, course_name=None,
+                      md5_checksum=None, version=None, export_format=None):
+        """Downloads a file from Drive to the local file system.
+        
+        The content is stored once in the blob store and the organized path is
+        linked to it, so a file attached to several assignments or courses is
+        kept (and, when its md5Checksum is known, downloaded) only once.
+        
+        Google Docs exports are cached per file ID, version and format, so an
+        unchanged document is only exported once.
+        
+        Data is written to a ".part" file and renamed into place only when complete,
+        so an existing file is always a finished download. An interrupted binary
+        download resumes from the .part file (HTTP Range) on the next attempt, and
+        the result is verified against md5Checksum; without a checksum nothing could
+        catch a file that changed in between, so the .part file is discarded instead.
+        
+        Args:
+            file_id: Drive file ID
+            file_name: Name of the file
+            mime_type: MIME type of the file
+            destination_folder: Base destination folder
+            assignment: Assignment metadata (for smart organization)
+            course_name: Course name (for smart organization)
+            md5_checksum: Drive md5Checksum the finished file is verified against; looked up
+                when None, '' = unknown (the file is downloaded in full)
+            version: Export cache key (see export_version); looked up when None, '' skips the cache
+            export_format: Export format for Google Docs, e.g. 'pdf' or 'docx' (default per type)
+        """
+        file_path, export_mime_type = self._resolve_target(
+            file_name, mime_type, destination_folder, assignment, course_name, export_format
+        )
+        if file_path is None:
+            return False, "Unsupported Google Doc type"
+        
+        if export_mime_type:
+            if version is None:
+                version = export_version(self.get_files_metadata([file_id]).get(file_id))
+            request = self.service.files().export_media(fileId=file_id, mimeType=export_mime_type)
+            # Exports are generated on the fly: no checksum, and they can't be resumed
+            blob_path = self.blobs.path_for(file_id, extension=os.path.splitext(file_path)[1], version=version)
+            md5_checksum = None
+            resumable = False
         else:
+            if md5_checksum is None:
+                md5_checksum = (self.get_files_metadata([file_id]).get(file_id) or {}).get('md5Checksum') or ''
             request = self.service.files().get_media(fileId=file_id)
+            blob_path = self.blobs.path_for(file_id, md5_checksum)
+            # A resumed download can only be trusted if it can be verified
+            resumable = bool(md5_checksum)
+        request.http = self._http()
 
-        fh = io.FileIO(file_path, 'wb')
-        downloader = MediaIoBaseDownload(fh, request)
-        done = False
+        part_path = blob_path + PART_SUFFIX
         try:
-            while done is False:
-                status, done = downloader.next_chunk()
-            return True, file_path
-        except HttpError as e:
+            with _blob_lock(blob_path):
+                # Same content already downloaded (possibly under another file ID or course),
+                # or this version of the document was already exported
+                if (md5_checksum or (export_mime_type and version)) and os.path.exists(blob_path):
+                    return True, self.blobs.link(blob_path, file_path, allow_symlink=not export_mime_type)
+                
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                try:
+                    resumed_from = self._fetch_media(request, part_path, resumable)
+                except HttpError as e:
+                    # 416: the .part file doesn't fit the current file (e.g. it changed); start over
+                    if e.resp.status != 416 or not os.path.exists(part_path):
+                        raise
+                    resumed_from = self._fetch_media(request, part_path, resume=False)
+                
+                if md5_checksum and self._md5(part_path) != md5_checksum:
+                    if not resumed_from:
+                        os.remove(part_path)
+                        return False, "Checksum mismatch"
+                    # Resumed onto stale bytes from an older version: download it once more in full
+                    self._fetch_media(request, part_path, resume=False)
+                    if self._md5(part_path) != md5_checksum:
+                        os.remove(part_path)
+                        return False, "Checksum mismatch"
+                
+                os.replace(part_path, blob_path)
+                if export_mime_type and version:
+                    self.blobs.drop_other_versions(blob_path)
+                # Old export blobs are dropped, so organized exports are never symlinks to them
+                return True, self.blobs.link(blob_path, file_path, allow_symlink=not export_mime_type)
+        except (HttpError, httplib2.HttpLib2Error, OSError) as e:
+            # The .part file is kept so the next attempt resumes where this one stopped
+            return False, str(e)
+
+    def link_copy(self, file_info, source_path):
+        """Places an already downloaded file at the path file_info would download to, without downloading."""
+        file_path, _ = self._resolve_target(
+            file_info['file_name'], file_info['mime_type'], file_info['destination_folder'],
+            file_info.get('assignment'), file_info.get('course_name'), file_info.get('export_format')
+        )
+        if file_path is None:
+            return False, "Unsupported Google Doc type"
+        try:
+            return True, self.blobs.link(source_path, file_path)
+        except OSError as e:
+            return False, str(e)
+
+    def _download_one(self, file_info):
+        try:
+            return self.download_file(
+                file_info['file_id'],
+                file_info['file_name'],
+                file_info['mime_type'],
+                file_info['destination_folder'],
+                file_info.get('assignment'),
+                file_info.get('course_name'),
+                file_info.get('md5_checksum'),
+                file_info.get('version'),
+                file_info.get('export_format')
+            )
+        except Exception as e:
             return False, str(e)
 
-    def batch_download(self, files_to_download, progress_callback=None):
-        """Download multiple files with progress tracking.
+    def batch_download(self, files_to_download, progress_callback=None, max_workers=None):
+        """Download multiple files concurrently with progress tracking.
         
         Args:
             files_to_download: List of dicts with file_id, file_name, mime_type, destination_folder, 
-                             and optionally assignment and course_name
-            progress_callback: Optional callback function(current, total) for progress updates
+                             and optionally assignment, course_name, md5_checksum, version and
+                             export_format (the same file may be listed once per export format)
+            progress_callback: Optional callback function(current, total) for progress updates.
+                             Always called from the calling thread, one call at a time,
+                             so it may safely update UI elements.
+            max_workers: Parallel downloads (defaults to self.max_workers; 1 downloads serially)
         
         Returns:
-            List of tuples (success, file_path_or_error)
+            List of tuples (success, file_path_or_error), in the same order as files_to_download
         """
-        results = []
+        # Look up export versions for all Google Docs, and checksums for all other files,
+        # in one batch instead of one call per file
+        def is_export(f):
+            return 'application/vnd.google-apps' in f['mime_type']
+        
+        def needs_metadata(f):
+            return f.get('version' if is_export(f) else 'md5_checksum') is None
+        
+        def with_metadata(f, metadata):
+            # '' = unknown: don't look it up again (exports skip the cache, binaries aren't deduplicated)
+            if is_export(f):
+                return dict(f, version=export_version(metadata) or '')
+            return dict(f, md5_checksum=(metadata or {}).get('md5Checksum') or '')
+        
+        missing = [f['file_id'] for f in files_to_download if needs_metadata(f)]
+        if missing:
+            metadata = self.get_files_metadata(missing)
+            files_to_download = [
+                with_metadata(f, metadata.get(f['file_id'])) if needs_metadata(f) else f
+                for f in files_to_download
+            ]
+        
         total = len(files_to_download)
+        results = [None] * total
+        max_workers = max(1, max_workers or self.max_workers)
         
-        for idx, file_info in enumerate(files_to_download):
-            success, result = self.download_file(
-                file_info['file_id'],
-                file_info['file_name'],
-                file_info['mime_type'],
-                file_info['destination_folder'],
-                file_info.get('assignment'),
-                file_info.get('course_name')
-            )
-            results.append((success, result))
-            
-            if progress_callback:
-                progress_callback(idx + 1, total)
+        if max_workers == 1 or total <= 1:
+            for idx, file_info in enumerate(files_to_download):
+                results[idx] = self._download_one(file_info)
+                if progress_callback:
+                    progress_callback(idx + 1, total)
+            return results
+        
+        # Each worker thread downloads over its own HTTP transport (see _http)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._download_one, file_info): idx
+                for idx, file_info in enumerate(files_to_download)
+            }
+            for completed, future in enumerate(as_completed(futures), 1):
+                results[futures[future]] = future.result()
+                if progress_callback:
+                    progress_callback(completed, total)
         
         return results
 
+    def get_files_metadata(self, file_ids):
+        """Fetches change-tracking metadata (md5Checksum, modifiedTime, size, version) for many files.
+        
+        Uses batch requests, so N files cost about N/100 round-trips.
+        
+        Returns:
+            Dict of file_id -> metadata dict (files that could not be read are left out)
+        """
+        metadata = {}
+        
+        def on_response(request_id, response, exception):
+            if exception is not None:
+                print(f"Error fetching metadata for {request_id}: {exception}")
+                return
+            metadata[request_id] = response
+        
+        file_ids = list(dict.fromkeys(file_ids))
+        for start in range(0, len(file_ids), METADATA_BATCH_SIZE):
+            http = self._http()
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for file_id in file_ids[start:start + METADATA_BATCH_SIZE]:
+                request = self.service.files().get(fileId=file_id, fields=METADATA_FIELDS)
+                # Sub-requests are authorized with their own transport, not the batch's
+                request.http = http
+                batch.add(request, request_id=file_id)
+            try:
+                batch.execute(http=http)
+            except HttpError as e:
+                print(f"Error fetching metadata: {e}")
+        
+        return metadata
+
+    def sync_files(self, files_to_download, course_name, progress_callback=None):
+        """Downloads only the files that are new or changed since the last sync.
+        
+        Compares Drive metadata with the course's DownloadManifest and skips
+        files whose local copy is still current.
+        
+        Args:
+            files_to_download: Same format as batch_download
+            course_name: Course whose manifest is used
+            progress_callback: Optional callback function(current, total), see batch_download
+        
+        Returns:
+            Dict with 'downloaded' and 'skipped' counts and 'failed' list of (file_name, error)
+        """
+        manifest = DownloadManifest(course_name)
+        metadata = self.get_files_metadata([f['file_id'] for f in files_to_download])
+        
+        pending = []
+        duplicates = []
+        local_paths = {}
+        seen = set()
+        for file_info in files_to_download:
+            file_id = file_info['file_id']
+            # The same attachment can appear under several assignments: download it once, link the rest
+            if file_id in seen:
+                duplicates.append(file_info)
+                continue
+            seen.add(file_id)
+            if manifest.is_unchanged(file_id, metadata.get(file_id)):
+                local_paths[file_id] = manifest.get_path(file_id)
+                continue
+            file_metadata = metadata.get(file_id) or {}
+            if 'application/vnd.google-apps' in file_info['mime_type']:
+                pending.append(dict(file_info, version=export_version(file_metadata) or ''))
+            else:
+                pending.append(dict(file_info, md5_checksum=file_metadata.get('md5Checksum') or ''))
+        
+        summary = {'downloaded': 0, 'skipped': len(files_to_download) - len(pending), 'failed': []}
+        results = self.batch_download(pending, progress_callback)
+        for file_info, (success, result) in zip(pending, results):
+            if success:
+                manifest.record(file_info['file_id'], metadata.get(file_info['file_id']), result)
+                local_paths[file_info['file_id']] = result
+                summary['downloaded'] += 1
+            else:
+                summary['failed'].append((file_info['file_name'], result))
+        
+        for file_info in duplicates:
+            source_path = local_paths.get(file_info['file_id'])
+            if source_path:
+                self.link_copy(file_info, source_path)
+        
+        if pending:
+            manifest.save()
+        return summary
+
     def open_file(self, file_path):
         """Opens a file with the default system application."""
         try:
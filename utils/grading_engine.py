@@ -1,102 +1,278 @@
-import json
 import re
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from utils.policy_registry import get_policy_registry, PolicyIndex, CategoryIndex
 
 def load_policies():
-    try:
-        with open('grading_policies.json', 'r') as f:
-            return json.load(f)
-    except:
-        return []
+    """Grading policies from grading_policies.json (re-read only after the file changes)."""
+    return get_policy_registry().policies
+
+# Keyword indexes for policy lists that don't come from the registry, keyed by id()
+_policy_indexes = {}
+
+def _policy_index(policies):
+    registry = get_policy_registry()
+    if policies is registry.policies:
+        return registry.index
+    entry = _policy_indexes.get(id(policies))
+    if entry is None or entry.policies is not policies:
+        if len(_policy_indexes) >= 16:
+            _policy_indexes.clear()
+        entry = _policy_indexes[id(policies)] = PolicyIndex(policies)
+    return entry
 
 def match_course_policy(course_name, policies):
-    """Matches a Classroom course name to a policy using keywords."""
-    course_name_lower = course_name.lower()
-    
-    best_match = None
-    max_score = 0
-    
-    for policy in policies:
-        score = 0
-        for keyword in policy['keywords']:
-            if keyword in course_name_lower:
-                score += len(keyword) # Longer keyword match = better score
-        
-        if score > max_score:
-            max_score = score
-            best_match = policy
-            
-    return best_match
+    """Matches a Classroom course name to a policy using keywords (longer keyword match = better score)."""
+    return _policy_index(policies).match(course_name)
+
+@lru_cache(maxsize=256)
+def _category_index(policy_categories):
+    return CategoryIndex(policy_categories)
 
 def categorize_assignment(title, policy_categories):
     """Matches an assignment title to a policy category (e.g., 'Quiz 1' -> 'Quizzes')."""
-    title_lower = title.lower()
+    return _category_index(tuple(policy_categories)).categorize(title)
+
+@lru_cache(maxsize=None)
+def _best_n(rule):
+    """N from a "best N of M" rule, or None if the rule doesn't limit the scores."""
+    if rule and "best" in rule:
+        match = re.search(r'best (\d+)', rule)
+        if match:
+            return int(match.group(1))
+    return None
+
+def policy_table(policies):
+    """Policies as one row per (Policy, Category) with its Weight and BestN (NaN = count every score).
     
-    # 1. Direct Match
-    for category in policy_categories:
-        if category.lower() in title_lower:
-            return category
-            
-    # 2. Fuzzy/Synonym Match
-    synonyms = {
-        "Quizzes": ["quiz", "test"],
-        "Assignments": ["assignment", "hw", "homework", "problem set"],
-        "Midterm Exam": ["midterm", "mt"],
-        "Final Exam": ["final"],
-        "Project": ["project", "milestone"],
-        "Lab": ["lab"],
-        "Lab Exam": ["lab exam", "practical"],
-        "Attendance": ["attendance", "participation"]
-    }
-    
-    for category, keywords in synonyms.items():
-        if category in policy_categories:
-            for keyword in keywords:
-                if keyword in title_lower:
-                    return category
-                    
-    return "Uncategorized"
+    policies: list of policy dicts; Policy is the index into that list.
+    """
+    rows = [
+        (policy_index, category, weight, _best_n(policy.get('rules', {}).get(category)))
+        for policy_index, policy in enumerate(policies)
+        for category, weight in policy['policy'].items()
+    ]
+    return pd.DataFrame(rows, columns=['Policy', 'Category', 'Weight', 'BestN']).astype(
+        {'Policy': int, 'Weight': float, 'BestN': float}
+    )
+
+def category_averages(grades_df, course_policies):
+    """Per-category averages for many courses at once, after applying "best N" drops.
+    
+    grades_df: DataFrame with Course, Category and Percentage columns
+    course_policies: {course: policy}; courses without a policy (None) are left out
+    Returns one row per graded policy category (by course, in policy order) with
+    Course, Category, Weight, BestN, Average and Counted (scores kept).
+    """
+    # Courses usually share a handful of policies: build each policy's rules once
+    policies = []
+    policy_codes = {}
+    course_policy = {}
+    for course, policy in course_policies.items():
+        if policy:
+            if id(policy) not in policy_codes:
+                policy_codes[id(policy)] = len(policies)
+                policies.append(policy)
+            course_policy[course] = policy_codes[id(policy)]
+    rules = policy_table(policies)
+    
+    # Each grade -> the (policy, category) rule it counts towards, or -1
+    course_codes, courses = pd.factorize(grades_df['Course'])
+    category_codes, categories = pd.factorize(grades_df['Category'])
+    rule_lookup = np.full((len(policies), len(categories) + 1), -1)
+    category_index = pd.Index(categories).get_indexer(rules['Category'])
+    rule_lookup[rules['Policy'].to_numpy(), category_index] = np.arange(len(rules))
+    grade_policy = grades_df['Course'].map(course_policy).fillna(-1).to_numpy(dtype=int)
+    rule = np.full(len(grades_df), -1)
+    has_policy = grade_policy >= 0
+    rule[has_policy] = rule_lookup[grade_policy[has_policy], category_codes[has_policy]]
+    
+    counted = rule >= 0
+    course_codes, rule, percentage = course_codes[counted], rule[counted], grades_df['Percentage'].to_numpy(dtype=float)[counted]
+    
+    # Group by (course, rule); "best N" categories sorted best score first, the rest keep their order
+    best_n = rules['BestN'].to_numpy()
+    group = course_codes.astype(np.int64) * max(len(rules), 1) + rule
+    has_rule = ~np.isnan(best_n[rule])
+    order = np.lexsort((np.where(has_rule, -percentage, 0), group))
+    group, rule, percentage = group[order], rule[order], percentage[order]
+    
+    # Keep the N best scores of each category that has a "best N" rule
+    starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]]) if len(group) else np.array([], dtype=int)
+    position = np.arange(len(group)) - np.repeat(starts, np.diff(np.r_[starts, len(group)]))
+    keep = np.isnan(best_n[rule]) | (position < best_n[rule])
+    group, rule, percentage = group[keep], rule[keep], percentage[keep]
+    
+    # Sequential per-group sums (np.bincount), in the same order as the original loop
+    groups, inverse = np.unique(group, return_inverse=True)
+    counts = np.bincount(inverse)
+    averages = np.bincount(inverse, weights=percentage) / counts
+    group_rules = groups % max(len(rules), 1)
+    return pd.DataFrame({
+        'Course': courses[groups // max(len(rules), 1)],
+        'Category': rules['Category'].to_numpy()[group_rules],
+        'Weight': rules['Weight'].to_numpy()[group_rules],
+        'BestN': best_n[group_rules],
+        'Average': averages,
+        'Counted': counts
+    })
+
+def calculate_weighted_grades(grades_df, course_policies):
+    """Weighted grades for many courses at once.
+    
+    Returns a DataFrame indexed by course with Grade and WeightUsed columns
+    (both 0 for a course with nothing graded yet), like calculate_weighted_grade.
+    """
+    averages = category_averages(grades_df, course_policies)
+    course_codes, courses = pd.factorize(averages['Course'])
+    total_grade = pd.Series(np.bincount(course_codes, weights=averages['Average'] * averages['Weight']), index=courses)
+    total_weight = pd.Series(np.bincount(course_codes, weights=averages['Weight']), index=courses)
+    
+    graded_courses = [course for course, policy in course_policies.items() if policy]
+    total_grade = total_grade.reindex(graded_courses, fill_value=0).astype(float)
+    total_weight = total_weight.reindex(graded_courses, fill_value=0).astype(float)
+    
+    # Normalize if not all categories are graded yet
+    graded = total_weight > 0
+    return pd.DataFrame({
+        'Grade': (total_grade / total_weight * 100).where(graded, 0),
+        'WeightUsed': (total_weight * 100).where(graded, 0)
+    })
 
 def calculate_weighted_grade(grades, policy):
     """
     Calculates the weighted grade based on the policy and rules.
-    grades: list of {'category': 'Quizzes', 'percentage': 85.0}
+    grades: list of {'Category': 'Quizzes', 'Percentage': 85.0}
+    For one course a plain loop beats building frames; use calculate_weighted_grades for many.
     """
     total_grade = 0
     total_weight = 0
     
-    # Group grades by category
     grouped_grades = {}
     for g in grades:
-        cat = g['Category']
-        if cat not in grouped_grades:
-            grouped_grades[cat] = []
-        grouped_grades[cat].append(g['Percentage'])
-        
+        grouped_grades.setdefault(g['Category'], []).append(g['Percentage'])
+    
+    rules = policy.get('rules', {})
     for category, weight in policy['policy'].items():
         if category in grouped_grades:
             scores = grouped_grades[category]
             
-            # Apply Rules (e.g., "best 2 of 3")
-            rule = policy.get('rules', {}).get(category)
-            if rule:
-                if "best" in rule:
-                    # Extract N (best N)
-                    try:
-                        n = int(re.search(r'best (\d+)', rule).group(1))
-                        scores.sort(reverse=True)
-                        scores = scores[:n]
-                    except:
-                        pass
+            n = _best_n(rules.get(category))
+            if n is not None:
+                scores = sorted(scores, reverse=True)[:n]
             
-            # Average the scores for this category
             if scores:
                 avg_score = sum(scores) / len(scores)
                 total_grade += avg_score * weight
                 total_weight += weight
-                
+    
     # Normalize if not all categories are graded yet
     if total_weight > 0:
         current_grade = (total_grade / total_weight) * 100
         return current_grade, total_weight * 100
     else:
         return 0, 0
+
+# Upper bound on scenario_grid rows (levels ** remaining categories)
+MAX_SCENARIOS = 500_000
+
+def grade_projection(grades_df, course_policies):
+    """Where each course stands, for what-if projections.
+    
+    Categories with at least one grade count as graded; the rest are remaining.
+    Returns a DataFrame indexed by course with Earned (sum of category average x weight),
+    GradedWeight, RemainingWeight and TotalWeight. Earned / TotalWeight is the final
+    grade (%) if every remaining category scored 0.
+    """
+    averages = category_averages(grades_df, course_policies)
+    graded_courses = [course for course, policy in course_policies.items() if policy]
+    
+    earned = (averages['Average'] * averages['Weight']).groupby(averages['Course']).sum()
+    graded_weight = averages.groupby('Course')['Weight'].sum()
+    total_weight = pd.Series(
+        [sum(course_policies[course]['policy'].values()) for course in graded_courses],
+        index=graded_courses, dtype=float
+    )
+    projection = pd.DataFrame({
+        'Earned': earned.reindex(graded_courses, fill_value=0).astype(float),
+        'GradedWeight': graded_weight.reindex(graded_courses, fill_value=0).astype(float),
+        'TotalWeight': total_weight
+    })
+    projection['RemainingWeight'] = (projection['TotalWeight'] - projection['GradedWeight']).clip(lower=0)
+    return projection
+
+def required_scores(projection, targets):
+    """Average score (%) needed on all remaining categories to finish at each target (%).
+    
+    projection: DataFrame from grade_projection
+    targets: one target or a list of targets
+    Returns a Series (one target) or a DataFrame with one column per target.
+    Above 100 means out of reach, 0 or less means already secured, NaN means
+    nothing is left to grade.
+    """
+    target_values = np.atleast_1d(np.asarray(targets, dtype=float))
+    remaining = projection['RemainingWeight'].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        needed = (
+            np.multiply.outer(projection['TotalWeight'].to_numpy(), target_values)
+            - projection['Earned'].to_numpy()[:, None]
+        ) / remaining[:, None]
+    needed[remaining <= 0] = np.nan
+    
+    result = pd.DataFrame(needed, index=projection.index, columns=target_values)
+    return result.iloc[:, 0] if np.ndim(targets) == 0 else result
+
+def scenario_grid(grades, policy, step=10):
+    """Final grade (%) for every combination of scores on a course's remaining categories.
+    
+    grades: list of {'Category', 'Percentage'} (as for calculate_weighted_grade)
+    step: score increment per category (0, step, 2*step, ..., 100)
+    Returns (scores, finals): a DataFrame with one score column per remaining
+    category (in policy order) and a Series of the matching final grades, kept
+    apart so no category name can clash with it. Rows are in C order, so the row
+    for scores (s1, s2, ...) is np.ravel_multi_index((s1 // step, s2 // step, ...), (levels,) * k).
+    """
+    grades_df = pd.DataFrame(grades, columns=['Category', 'Percentage']).assign(Course=0)
+    projection = grade_projection(grades_df, {0: policy}).loc[0]
+    graded = set(category_averages(grades_df, {0: policy})['Category'])
+    remaining = [(category, weight) for category, weight in policy['policy'].items() if category not in graded]
+    
+    levels = np.arange(0, 100 + step, step, dtype=float)
+    levels = levels[levels <= 100]
+    if len(levels) ** len(remaining) > MAX_SCENARIOS:
+        raise ValueError(f"{len(levels) ** len(remaining):,} scenarios; use a larger step")
+    
+    # Every combination of remaining-category scores, one row each
+    mesh = np.meshgrid(*[levels] * len(remaining), indexing='ij')
+    scores = np.stack([m.ravel() for m in mesh], axis=1) if remaining else np.zeros((1, 0))
+    weights = np.array([weight for _, weight in remaining], dtype=float)
+    
+    finals = pd.Series((projection['Earned'] + scores @ weights) / projection['TotalWeight'], name='Final')
+    return pd.DataFrame(scores, columns=[category for category, _ in remaining]), finals
+
+def course_grades(grades_df, course_policies):
+    """Current grade (%) per course: policy-weighted over the graded categories, else the plain average.
+    
+    grades_df: DataFrame with Course, Category and Percentage columns
+    course_policies: {course: policy or None}
+    Returns a Series indexed by course (NaN for a course with nothing graded).
+    """
+    projection = grade_projection(grades_df, course_policies)
+    weighted = (projection['Earned'] / projection['GradedWeight']).where(projection['GradedWeight'] > 0)
+    plain = grades_df.groupby('Course')['Percentage'].mean()
+    return pd.Series(
+        [weighted.get(course, np.nan) if policy else plain.get(course, np.nan)
+         for course, policy in course_policies.items()],
+        index=list(course_policies), dtype=float
+    )
+
+# Lowest percentage that earns each grade point (4.0 scale), highest first
+GPA_SCALE = [(93, 4.0), (90, 3.7), (87, 3.3), (83, 3.0), (80, 2.7), (77, 2.3), (73, 2.0), (70, 1.7), (67, 1.3), (63, 1.0), (60, 0.7)]
+
+def grade_points(percentages):
+    """Grade points on GPA_SCALE for an array of percentages (0 below the lowest cutoff, NaN stays NaN)."""
+    values = np.asarray(percentages, dtype=float)
+    cutoffs = np.array([cutoff for cutoff, _ in reversed(GPA_SCALE)], dtype=float)
+    points = np.array([0.0] + [point for _, point in reversed(GPA_SCALE)])
+    return np.where(np.isnan(values), np.nan, points[np.searchsorted(cutoffs, values, side='right')])
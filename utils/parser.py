@@ -1,8 +1,245 @@
 import re
+import os
+import json
+import atexit
+import hashlib
+import time
+import threading
+from collections import OrderedDict
 from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# Matches: "Lab 3", "Lab03", "Lab #3", "L3", "Sheet 4"
+INDEX_PATTERN = re.compile(r'(?:^|\s|#|[a-z])(\d+)(?:$|\s|:)')
+DIGITS_PATTERN = re.compile(r'\d+')
+
+# Extra words stripped from titles when extracting the topic
+TOPIC_STOP_WORDS = ['week', 'unit', 'part', 'pdf', 'docx', 'ppt']
+
+# Keywords that refine a QUIZ into MIDTERM / FINAL
+MIDTERM_KEYWORDS = ['midterm', 'mt']
+FINAL_KEYWORDS = ['final']
+
+PARSE_CACHE_SIZE = 20000
+PARSE_CACHE_PATH = os.path.join(".cache", "parse_cache.json")
+
+
+class CompiledMatcher:
+    """Precompiled regexes for one category keyword table.
+
+    Finds every keyword in a title with a single scan and strips all topic
+    words with a single substitution, giving the same results as checking
+    keywords one by one and calling re.sub once per word.
+    """
+
+    def __init__(self, categories):
+        self.categories = {cat: list(keywords) for cat, keywords in categories.items()}
+        # Identifies the keyword table (and stop words) this matcher was built from
+        self.fingerprint = hashlib.sha1(
+            json.dumps([self.categories, TOPIC_STOP_WORDS, MIDTERM_KEYWORDS, FINAL_KEYWORDS]).encode()
+        ).hexdigest()
+        vocabulary = {k for keywords in self.categories.values() for k in keywords}
+        vocabulary.update(MIDTERM_KEYWORDS + FINAL_KEYWORDS)
+        vocabulary = sorted(vocabulary, key=len, reverse=True)
+
+        # A zero-width lookahead tries every position, and longest-first
+        # alternation reports the longest keyword starting there. Any shorter
+        # keyword starting at the same position is a prefix of it, so expand
+        # each hit to all the keywords it implies.
+        self.keyword_pattern = re.compile('(?=(' + '|'.join(re.escape(k) for k in vocabulary) + '))')
+        self.implied = {k: {p for p in vocabulary if k.startswith(p)} for k in vocabulary}
+
+        self.remove_words = [k for kw in self.categories.values() for k in kw] + TOPIC_STOP_WORDS
+        if self._can_merge(self.remove_words):
+            unique = sorted({w.lower(): w for w in self.remove_words}.values(), key=len, reverse=True)
+            self.topic_patterns = [
+                re.compile(r'\b(?:' + '|'.join(re.escape(w) for w in unique) + r')\b', flags=re.IGNORECASE)
+            ]
+        else:
+            # Removing one word could change whether another matches, so keep
+            # the original one-word-at-a-time order (still precompiled).
+            self.topic_patterns = [
+                re.compile(r'\b' + re.escape(w) + r'\b', flags=re.IGNORECASE) for w in self.remove_words
+            ]
+
+    @staticmethod
+    def _can_merge(words):
+        """True if one alternation removes exactly what sequential re.sub calls would.
+
+        That holds when every word starts and ends with a word character and no
+        two distinct words share a token (so no two matches can overlap).
+        """
+        seen_tokens = {}
+        for word in {w.lower() for w in words}:
+            if not re.match(r'\w', word) or not re.search(r'\w$', word):
+                return False
+            for token in set(re.findall(r'\w+', word)):
+                if seen_tokens.setdefault(token, word) != word:
+                    return False
+        return True
+
+    def find_keywords(self, title_lower):
+        """All vocabulary keywords occurring (as substrings) in a lowercased title."""
+        found = set()
+        for keyword in self.keyword_pattern.findall(title_lower):
+            found |= self.implied[keyword]
+        return found
+
+    def category(self, title_lower):
+        found = self.find_keywords(title_lower)
+
+        category = "UNCATEGORIZED"
+        for cat, keywords in self.categories.items():
+            if any(k in found for k in keywords):
+                category = cat
+                break
+
+        # Refine Quiz vs Exam
+        if category == 'QUIZ':
+            if any(k in found for k in MIDTERM_KEYWORDS):
+                category = 'MIDTERM'
+            elif any(k in found for k in FINAL_KEYWORDS):
+                category = 'FINAL'
+        return category
+
+    def strip_topic_words(self, title):
+        for pattern in self.topic_patterns:
+            title = pattern.sub('', title)
+        return title
+
+
+class ParseCache:
+    """Bounded LRU cache of parse_item results, with an optional JSON file behind it.
+
+    Entries are keyed by a hash of title and description and belong to one
+    keyword table fingerprint; when the table changes the cache starts over.
+    """
+
+    # Minimum seconds between automatic writes to disk (it is also saved at exit)
+    SAVE_INTERVAL = 60
+
+    def __init__(self, max_size=PARSE_CACHE_SIZE, persist_path=None):
+        self.max_size = max_size
+        self.persist_path = persist_path
+        self.fingerprint = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._unsaved = 0
+        self._last_save = time.time()
+        self._lock = threading.Lock()
+
+        if persist_path:
+            self._load()
+            atexit.register(self.save)
+
+    @staticmethod
+    def make_key(title, description=""):
+        return hashlib.sha1(f"{title}\x00{description or ''}".encode('utf-8')).hexdigest()
+
+    def _bind(self, fingerprint):
+        """Drops every entry if they were computed with a different keyword table."""
+        if fingerprint != self.fingerprint:
+            self._entries.clear()
+            self.fingerprint = fingerprint
+            self._unsaved = 0
+
+    def get(self, fingerprint, key):
+        with self._lock:
+            self._bind(fingerprint)
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(result)
+
+    def put(self, fingerprint, key, result):
+        with self._lock:
+            self._bind(fingerprint)
+            self._entries[key] = dict(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._unsaved += 1
+            should_save = self.persist_path and time.time() - self._last_save >= self.SAVE_INTERVAL
+        if should_save:
+            self.save()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self._unsaved = 0
+
+    def stats(self):
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._entries),
+                'max_size': self.max_size
+            }
+
+    def _load(self):
+        if not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.fingerprint = data.get('fingerprint')
+            self._entries = OrderedDict(list(data.get('entries', {}).items())[-self.max_size:])
+        except Exception as e:
+            print(f"Error reading parse cache: {e}")
+
+    def save(self):
+        """Writes the cache to persist_path (if configured and anything changed)."""
+        if not self.persist_path:
+            return False
+        with self._lock:
+            if not self._unsaved:
+                return True
+            data = {'fingerprint': self.fingerprint, 'entries': dict(self._entries)}
+            self._unsaved = 0
+            self._last_save = time.time()
+        try:
+            cache_dir = os.path.dirname(self.persist_path)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = self.persist_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.persist_path)
+            return True
+        except Exception as e:
+            print(f"Error saving parse cache: {e}")
+            return False
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_parse_cache():
+    """Process-wide parse cache (persisted under .cache/), shared by every parser."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ParseCache(persist_path=PARSE_CACHE_PATH)
+        return _shared_cache
+
 
 class AcademicParser:
-    def __init__(self):
+    def __init__(self, cache=None):
+        """
+        cache: a ParseCache, None for the shared process-wide cache, or False to disable caching.
+        """
         self.categories = {
             'QUIZ': ['quiz', 'test', 'exam', 'midterm', 'final', 'mt'],
             'LAB': ['lab', 'practical', 'experiment'],
@@ -12,45 +249,47 @@ class AcademicParser:
             'TUTORIAL': ['tutorial', 'recitation'],
             'GRADE': ['grade', 'score', 'result']
         }
+        self._matcher = None
+        self.cache = get_shared_parse_cache() if cache is None else (cache or None)
+
+    @property
+    def matcher(self):
+        """CompiledMatcher for the current keyword table, rebuilt if the table was edited."""
+        if self._matcher is None or self._matcher.categories != self.categories:
+            self._matcher = CompiledMatcher(self.categories)
+        return self._matcher
 
     def parse_item(self, title, description="", materials=None):
         """
         Parses a raw item (assignment/material) and returns structured metadata.
         """
+        matcher = self.matcher
+        if self.cache is None:
+            return self._parse(matcher, title)
+
+        key = ParseCache.make_key(title, description)
+        result = self.cache.get(matcher.fingerprint, key)
+        if result is None:
+            result = self._parse(matcher, title)
+            self.cache.put(matcher.fingerprint, key, result)
+        return result
+
+    def _parse(self, matcher, title):
         title_lower = title.lower()
-        desc_lower = (description or "").lower()
         
-        # 1. Categorization
-        category = "UNCATEGORIZED"
-        for cat, keywords in self.categories.items():
-            if any(k in title_lower for k in keywords):
-                category = cat
-                break
-        
-        # Refine Quiz vs Exam
-        if category == 'QUIZ':
-            if any(x in title_lower for x in ['midterm', 'mt']):
-                category = 'MIDTERM'
-            elif 'final' in title_lower:
-                category = 'FINAL'
+        # 1. Categorization (single keyword scan)
+        category = matcher.category(title_lower)
 
         # 2. Indexing (Extract Number)
-        # Matches: "Lab 3", "Lab03", "Lab #3", "L3", "Sheet 4"
         index = None
-        match = re.search(r'(?:^|\s|#|[a-z])(\d+)(?:$|\s|:)', title_lower)
+        match = INDEX_PATTERN.search(title_lower)
         if match:
             index = int(match.group(1))
 
         # 3. Topic Extraction (Simple Heuristic)
         # Remove common words and category names to find the topic
-        topic = title
-        remove_words = [k for kw in self.categories.values() for k in kw] + \
-                       ['week', 'unit', 'part', 'pdf', 'docx', 'ppt']
-        
-        for word in remove_words:
-            topic = re.sub(r'\b' + re.escape(word) + r'\b', '', topic, flags=re.IGNORECASE)
-        
-        topic = re.sub(r'\d+', '', topic).strip(' -_#:')
+        topic = matcher.strip_topic_words(title)
+        topic = DIGITS_PATTERN.sub('', topic).strip(' -_#:')
         if len(topic) < 3: # If topic is too short, it's probably just "Lab 3"
             topic = None
 
@@ -61,21 +300,77 @@ class AcademicParser:
             'original_title': title
         }
 
+    def parse_batch(self, titles, descriptions=None):
+        """
+        Vectorized parse_item for many titles at once.
+        
+        Returns a DataFrame (one row per title, same order) with the columns
+        'category', 'index' (nullable Int64), 'topic' (None when missing) and
+        'original_title'. Values match parse_item row for row.
+        descriptions is accepted for symmetry with parse_item; like parse_item,
+        the result depends on the titles only.
+        """
+        matcher = self.matcher
+        all_titles = pd.Series(list(titles), dtype=object)
+        # Course titles repeat a lot ("Lecture Notes", "Quiz 1"): work on unique ones only
+        codes, uniques = pd.factorize(all_titles)
+        titles = pd.Series(uniques, dtype=object)
+        lower = titles.str.lower()
+        
+        # 1. Categorization: first category (in table order) with any keyword in the title
+        def contains_any(keywords):
+            if not keywords:
+                return np.zeros(len(lower), dtype=bool)
+            pattern = '|'.join(re.escape(k) for k in keywords)
+            return lower.str.contains(pattern, regex=True).to_numpy(dtype=bool)
+        
+        category = np.select(
+            [contains_any(keywords) for keywords in matcher.categories.values()],
+            list(matcher.categories.keys()),
+            default='UNCATEGORIZED'
+        ).astype(object)
+        
+        # Refine Quiz vs Exam
+        is_quiz = category == 'QUIZ'
+        is_midterm = is_quiz & contains_any(MIDTERM_KEYWORDS)
+        is_final = is_quiz & ~is_midterm & contains_any(FINAL_KEYWORDS)
+        category[is_midterm] = 'MIDTERM'
+        category[is_final] = 'FINAL'
+        
+        # 2. Indexing (Extract Number)
+        index = pd.to_numeric(lower.str.extract(INDEX_PATTERN, expand=False)).astype('Int64')
+        
+        # 3. Topic Extraction
+        topic = titles
+        for pattern in matcher.topic_patterns:
+            topic = topic.str.replace(pattern, '', regex=True)
+        topic = topic.str.replace(DIGITS_PATTERN, '', regex=True).str.strip(' -_#:')
+        topic = topic.astype(object).where(topic.str.len() >= 3, None)
+        
+        return pd.DataFrame({
+            'category': pd.Series(category[codes], dtype=object),
+            'index': index.take(codes).reset_index(drop=True),
+            'topic': pd.Series(topic.to_numpy()[codes], dtype=object),
+            'original_title': all_titles
+        })
+
     def enrich_course_data(self, course_works):
         """
         Takes a list of raw course works and returns enriched, sorted data.
         """
-        enriched = []
-        for work in course_works:
-            metadata = self.parse_item(work['title'], work.get('description'))
-            
-            # Merge metadata
+        enriched = list(course_works)
+        parsed = self.parse_batch(
+            [work['title'] for work in enriched],
+            [work.get('description') for work in enriched]
+        )
+        
+        # Merge metadata
+        for work, category, index, topic in zip(enriched, parsed['category'], parsed['index'], parsed['topic']):
             work.update({
-                'smart_category': metadata['category'],
-                'smart_index': metadata['index'],
-                'smart_topic': metadata['topic']
+                'smart_category': category,
+                'smart_index': None if pd.isna(index) else int(index),
+                'smart_topic': topic
             })
-            enriched.append(work)
             
         # Sort by Category then Index
         enriched.sort(key=lambda x: (x['smart_category'], x.get('smart_index') or 999))
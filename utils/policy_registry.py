@@ -0,0 +1,168 @@
+import os
+import json
+import threading
+from collections import deque
+
+POLICIES_PATH = 'grading_policies.json'
+
+# Title keywords for each policy category, checked in this order after direct category-name matches
+CATEGORY_SYNONYMS = {
+    "Quizzes": ["quiz", "test"],
+    "Assignments": ["assignment", "hw", "homework", "problem set"],
+    "Midterm Exam": ["midterm", "mt"],
+    "Final Exam": ["final"],
+    "Project": ["project", "milestone"],
+    "Lab": ["lab"],
+    "Lab Exam": ["lab exam", "practical"],
+    "Attendance": ["attendance", "participation"]
+}
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton: finds which of many substrings occur in a text in one pass."""
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [set()]
+
+        for index, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(set())
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._out[state].add(index)
+
+        # Failure links, breadth first
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._out[child] |= self._out[self._fail[child]]
+
+    def find(self, text):
+        """Indices of the patterns that occur in text."""
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            if self._out[state]:
+                found |= self._out[state]
+        return found
+
+class PolicyIndex:
+    """Course-name keyword index over a list of grading policies."""
+
+    def __init__(self, policies):
+        self.policies = policies
+        keywords = {}
+        for policy_index, policy in enumerate(policies):
+            for keyword in policy['keywords']:
+                # A keyword listed twice in a policy counts twice, as in a plain scan
+                keywords.setdefault(keyword, []).append(policy_index)
+        self._keywords = list(keywords)
+        self._owners = [keywords[k] for k in self._keywords]
+        self._automaton = KeywordAutomaton(self._keywords)
+
+    def match(self, course_name):
+        """The policy whose matched keywords are longest in total (first one on ties), or None."""
+        scores = {}
+        for keyword_index in self._automaton.find(course_name.lower()):
+            for policy_index in self._owners[keyword_index]:
+                scores[policy_index] = scores.get(policy_index, 0) + len(self._keywords[keyword_index])
+        if not scores:
+            return None
+        best_score = max(scores.values())
+        if best_score <= 0:
+            return None
+        return self.policies[min(i for i, score in scores.items() if score == best_score)]
+
+class CategoryIndex:
+    """Assignment-title index for one policy's categories (names first, then CATEGORY_SYNONYMS)."""
+
+    def __init__(self, policy_categories):
+        self.categories = list(policy_categories)
+        self._synonym_categories = [c for c in CATEGORY_SYNONYMS if c in self.categories]
+        patterns = [category.lower() for category in self.categories]
+        self._synonym_owner = []
+        for rank, category in enumerate(self._synonym_categories):
+            for keyword in CATEGORY_SYNONYMS[category]:
+                patterns.append(keyword)
+                self._synonym_owner.append(rank)
+        self._automaton = KeywordAutomaton(patterns)
+
+    def categorize(self, title):
+        found = self._automaton.find(title.lower())
+        if not found:
+            return "Uncategorized"
+        names = len(self.categories)
+        # 1. Direct match: first category (in policy order) named in the title
+        direct = [i for i in found if i < names]
+        if direct:
+            return self.categories[min(direct)]
+        # 2. Synonym match: first synonym category (in CATEGORY_SYNONYMS order) with a keyword in the title
+        return self._synonym_categories[min(self._synonym_owner[i - names] for i in found)]
+
+class PolicyRegistry:
+    """grading_policies.json loaded and indexed once, reloaded only when the file's mtime changes."""
+
+    def __init__(self, path=POLICIES_PATH):
+        self.path = path
+        self._mtime = None
+        self._policies = []
+        self._index = PolicyIndex([])
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            try:
+                with open(self.path, 'r') as f:
+                    policies = json.load(f)
+            except:
+                policies = []
+            self._index = PolicyIndex(policies)
+            self._policies = policies
+            self._mtime = mtime
+
+    @property
+    def policies(self):
+        self._refresh()
+        return self._policies
+
+    @property
+    def index(self):
+        self._refresh()
+        return self._index
+
+    @property
+    def version(self):
+        """Changes whenever the policies file does (its mtime)."""
+        self._refresh()
+        return self._mtime
+
+_registry = PolicyRegistry()
+
+def get_policy_registry():
+    """The process-wide registry for grading_policies.json."""
+    return _registry
@@ -1,38 +1,126 @@
 import os
+import io
 import json
-from datetime import datetime
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import requests
+
+try:
+    from PIL import Image
+except ImportError:  # Thumbnails are stored as served by Google
+    Image = None
+
+# Minimum wait before retrying photos that were skipped because of rate limiting
+PHOTO_RETRY_INTERVAL = timedelta(minutes=10)
+
+# How long a cached roster is trusted; empty rosters (negative results) expire sooner
+TEACHER_TTL = timedelta(days=7)
+NEGATIVE_TTL = timedelta(hours=6)
+
+# Rosters kept in memory (LRU), shared by every TeacherCache in the process
+MEMORY_CACHE_SIZE = 128
+
+_memory = OrderedDict()
+_memory_lock = threading.Lock()
+
+# Local avatar store: thumbnails are revalidated (If-None-Match / If-Modified-Since) after PHOTO_TTL
+PHOTO_STORE_PATH = os.path.join("Downloads", ".photos")
+PHOTO_TTL = timedelta(days=1)
+THUMBNAIL_SIZE = 100
+MEMORY_PHOTO_CACHE_SIZE = 256
+PHOTO_TIMEOUT = 5
+# A photo that couldn't be fetched (and isn't cached) is served as its remote URL for this long before retrying
+PHOTO_FAILURE_TTL = timedelta(minutes=5)
+
+_photos = OrderedDict()
+_photos_lock = threading.Lock()
 
 class TeacherCache:
-    """Cache teacher profile data to avoid repeated API calls and 429 errors."""
+    """Cache teacher profile data to avoid repeated API calls and 429 errors.
+    
+    Two tiers: a process-wide in-memory LRU in front of one JSON file per course.
+    """
     
     def __init__(self, base_path="Downloads"):
         self.base_path = base_path
     
-    def _get_cache_path(self, course_name):
-        """Get the cache file path for a course."""
+    def _get_cache_path(self, course_name, create=False):
+        """Get the cache file path for a course (creating its folder only when about to write)."""
         safe_name = "".join([c for c in course_name if c.isalpha() or c.isdigit() or c==' ']).rstrip()
         course_dir = os.path.join(self.base_path, safe_name, "Teachers")
-        os.makedirs(course_dir, exist_ok=True)
+        if create:
+            os.makedirs(course_dir, exist_ok=True)
         return os.path.join(course_dir, "cache.json")
     
-    def get_teachers(self, course_name):
-        """Retrieve cached teacher data for a course."""
+    def _remember(self, cache_path, data):
+        with _memory_lock:
+            _memory[cache_path] = data
+            _memory.move_to_end(cache_path)
+            while len(_memory) > MEMORY_CACHE_SIZE:
+                _memory.popitem(last=False)
+    
+    def _load(self, course_name):
+        """Cached entry ({'teachers', 'cached_at', ...}) from memory, else from disk; None if absent."""
         cache_path = self._get_cache_path(course_name)
         
+        with _memory_lock:
+            data = _memory.get(cache_path)
+            if data is not None:
+                _memory.move_to_end(cache_path)
+                return data
+        
         if not os.path.exists(cache_path):
             return None
         
         try:
             with open(cache_path, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-                return data.get('teachers', [])
         except Exception as e:
             print(f"Error reading cache: {e}")
             return None
+        
+        self._remember(cache_path, data)
+        return data
     
-    def save_teachers(self, course_name, teachers):
-        """Save teacher data to cache."""
-        cache_path = self._get_cache_path(course_name)
+    @staticmethod
+    def _is_expired(data):
+        try:
+            cached_at = datetime.fromisoformat(data['cached_at'])
+        except (KeyError, TypeError, ValueError):
+            return True
+        ttl = TEACHER_TTL if data.get('teachers') else NEGATIVE_TTL
+        return datetime.now() - cached_at >= ttl
+    
+    def get_teachers(self, course_name):
+        """Retrieve cached teacher data for a course.
+        
+        Returns None on a miss or when the entry has expired. An empty list is a
+        cached negative result (the course has no teachers listed).
+        """
+        data = self._load(course_name)
+        if data is None or self._is_expired(data):
+            return None
+        return data.get('teachers', [])
+    
+    def needs_photo_retry(self, course_name):
+        """True if the cached teachers are missing photos and it's time to try fetching them again."""
+        data = self._load(course_name)
+        if data is None or data.get('photos_complete', True):
+            return False
+        try:
+            return datetime.now() - datetime.fromisoformat(data['cached_at']) >= PHOTO_RETRY_INTERVAL
+        except (KeyError, TypeError, ValueError):
+            return False
+    
+    def save_teachers(self, course_name, teachers, photos_complete=True):
+        """Save teacher data to cache.
+        
+        photos_complete=False marks photos skipped because of rate limiting, to be retried later.
+        """
+        cache_path = self._get_cache_path(course_name, create=True)
         
         try:
             # Extract only necessary fields
@@ -48,12 +136,14 @@ class TeacherCache:
             
             data = {
                 'teachers': cached_teachers,
-                'cached_at': datetime.now().isoformat()
+                'cached_at': datetime.now().isoformat(),
+                'photos_complete': photos_complete
             }
             
             with open(cache_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=2, ensure_ascii=False)
             
+            self._remember(cache_path, data)
             return True
         except Exception as e:
             print(f"Error saving cache: {e}")
@@ -62,6 +152,8 @@ class TeacherCache:
     def clear_cache(self, course_name):
         """Clear cached teacher data for a course."""
         cache_path = self._get_cache_path(course_name)
+        with _memory_lock:
+            _memory.pop(cache_path, None)
         if os.path.exists(cache_path):
             try:
                 os.remove(cache_path)
@@ -70,3 +162,137 @@ class TeacherCache:
                 print(f"Error clearing cache: {e}")
                 return False
         return True
+
+
+def normalize_photo_url(photo_url, size=THUMBNAIL_SIZE):
+    """Absolute Google avatar URL asking for a size x size cropped image."""
+    if not photo_url.startswith('http'):
+        photo_url = f"https:{photo_url}"
+    if '/s' in photo_url:
+        photo_url = photo_url.split('/s')[0] + f'/s{size}-c'
+    return photo_url
+
+class PhotoCache:
+    """Teacher / profile photos fetched once and kept as small thumbnails.
+    
+    Served from memory, else from disk (Downloads/.photos). After PHOTO_TTL a
+    photo is revalidated with a conditional request, so unchanged avatars cost
+    a 304 instead of a download. Falls back to the remote URL when offline.
+    """
+    
+    def __init__(self, base_path=PHOTO_STORE_PATH, size=THUMBNAIL_SIZE):
+        self.base_path = base_path
+        self.size = size
+    
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode()).hexdigest()
+        return os.path.join(self.base_path, key), os.path.join(self.base_path, f"{key}.json")
+    
+    def _thumbnail(self, content, content_type):
+        """Shrinks the image to the thumbnail size (when Pillow is installed)."""
+        if Image is None:
+            return content, content_type
+        try:
+            with Image.open(io.BytesIO(content)) as image:
+                if max(image.size) <= self.size:
+                    return content, content_type
+                image.thumbnail((self.size, self.size))
+                out = io.BytesIO()
+                image.convert('RGB').save(out, format='JPEG', quality=85)
+                return out.getvalue(), 'image/jpeg'
+        except Exception as e:
+            print(f"Error resizing photo: {e}")
+            return content, content_type
+    
+    def _read_disk(self, url):
+        image_path, meta_path = self._paths(url)
+        if not (os.path.exists(image_path) and os.path.exists(meta_path)):
+            return None, None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(image_path, 'rb') as f:
+                return f.read(), meta
+        except Exception as e:
+            print(f"Error reading photo cache: {e}")
+            return None, None
+    
+    def _write_disk(self, url, content, meta):
+        image_path, meta_path = self._paths(url)
+        try:
+            os.makedirs(self.base_path, exist_ok=True)
+            with open(image_path, 'wb') as f:
+                f.write(content)
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+        except Exception as e:
+            print(f"Error saving photo cache: {e}")
+    
+    def _fetch(self, url, content, meta):
+        """Downloads the photo, or revalidates the cached copy; returns (content, meta)."""
+        headers = {}
+        if meta and meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta and meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        
+        response = requests.get(url, headers=headers, timeout=PHOTO_TIMEOUT)
+        if response.status_code == 304 and content is not None:
+            meta = dict(meta, checked_at=datetime.now().isoformat())
+        else:
+            response.raise_for_status()
+            content, content_type = self._thumbnail(
+                response.content, response.headers.get('Content-Type', 'image/jpeg')
+            )
+            meta = {
+                'content_type': content_type,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'checked_at': datetime.now().isoformat()
+            }
+        self._write_disk(url, content, meta)
+        return content, meta
+    
+    def get_photo(self, photo_url):
+        """Image source for an <img> tag: a data URI of the cached thumbnail, else the remote URL."""
+        if not photo_url:
+            return ''
+        url = normalize_photo_url(photo_url, self.size)
+        
+        with _photos_lock:
+            cached = _photos.get(url)
+            if cached is not None:
+                _photos.move_to_end(url)
+        if cached is not None and datetime.now() - cached[1] < cached[2]:
+            return cached[0]
+        
+        content, meta = self._read_disk(url)
+        try:
+            checked_at = datetime.fromisoformat(meta['checked_at']) if meta else None
+        except (KeyError, TypeError, ValueError):
+            checked_at = None
+        
+        if checked_at is None or datetime.now() - checked_at >= PHOTO_TTL:
+            try:
+                content, meta = self._fetch(url, content, meta)
+                checked_at = datetime.now()
+            except Exception as e:
+                print(f"Error fetching photo: {e}")
+                if content is None:
+                    # Negative entry: don't block every rerun on the same failing fetch
+                    self._remember(url, url, datetime.now(), PHOTO_FAILURE_TTL)
+                    return url
+                # Keep serving the stale copy; don't retry on every rerun
+                checked_at = datetime.now()
+        
+        data_uri = f"data:{meta['content_type']};base64,{base64.b64encode(content).decode()}"
+        self._remember(url, data_uri, checked_at, PHOTO_TTL)
+        return data_uri
+
+    @staticmethod
+    def _remember(url, src, checked_at, ttl):
+        with _photos_lock:
+            _photos[url] = (src, checked_at, ttl)
+            _photos.move_to_end(url)
+            while len(_photos) > MEMORY_PHOTO_CACHE_SIZE:
+                _photos.popitem(last=False)